@@ -1,8 +1,35 @@
 """Container for the Dependency Injection in Python."""
 
 # pylint: skip-file
-from .builder import ContainerBuilder
-from .container import Container, ContainerKey
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .builder import ContainerBuilder
+    from .cache import CacheOptions, MethodCache
+    from .container import Container, ContainerKey
+    from .frozen import FrozenContainer
+    from .instrument import Instrument, MemoryRecorder, TraceRecorder, instrumented
+    from .metrics import ContainerMetrics
+    from .pool import InstancePool, PoolLease
+    from .provider import Provider
+    from .scope import (
+        CachedService,
+        LazyService,
+        LoopScopedService,
+        PooledService,
+        RefreshingService,
+        ScopedService,
+        ServiceLRU,
+        TaskScopedService,
+    )
+    from .snapshot import (
+        ContainerSnapshot,
+        worker_container,
+        worker_initializer,
+    )
+    from .tags import ServiceTag, TaggedServices
+    from .warmup import Warmup
 
 __version__ = '1.3.0'
 
@@ -11,4 +38,78 @@ __all__ = (
     'Container',
     'ContainerKey',
     'ContainerBuilder',
+    'FrozenContainer',
+    'Provider',
+    'ContainerSnapshot',
+    'worker_initializer',
+    'worker_container',
+    # scopes
+    'ScopedService',
+    'TaskScopedService',
+    'LoopScopedService',
+    'PooledService',
+    'LazyService',
+    'RefreshingService',
+    'CachedService',
+    'ServiceLRU',
+    'Warmup',
+    'InstancePool',
+    'PoolLease',
+    # tags
+    'ServiceTag',
+    'TaggedServices',
+    # caching
+    'CacheOptions',
+    'MethodCache',
+    # instrumentation
+    'Instrument',
+    'TraceRecorder',
+    'MemoryRecorder',
+    'instrumented',
+    'ContainerMetrics',
 )
+
+# submodule of each name, imported on first access (PEP 562) so e.g. "from aiodi import Container" does not load the
+# builder, resolvers and TOML machinery
+_modules = {
+    'Container': 'container',
+    'ContainerKey': 'container',
+    'ContainerBuilder': 'builder',
+    'FrozenContainer': 'frozen',
+    'Provider': 'provider',
+    'ContainerSnapshot': 'snapshot',
+    'worker_initializer': 'snapshot',
+    'worker_container': 'snapshot',
+    'ScopedService': 'scope',
+    'TaskScopedService': 'scope',
+    'LoopScopedService': 'scope',
+    'PooledService': 'scope',
+    'LazyService': 'scope',
+    'RefreshingService': 'scope',
+    'CachedService': 'scope',
+    'ServiceLRU': 'scope',
+    'Warmup': 'warmup',
+    'InstancePool': 'pool',
+    'PoolLease': 'pool',
+    'ServiceTag': 'tags',
+    'TaggedServices': 'tags',
+    'CacheOptions': 'cache',
+    'MethodCache': 'cache',
+    'Instrument': 'instrument',
+    'TraceRecorder': 'instrument',
+    'MemoryRecorder': 'instrument',
+    'instrumented': 'instrument',
+    'ContainerMetrics': 'metrics',
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _modules:
+        raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+    val = getattr(import_module('.{0}'.format(_modules[name]), __name__), name)
+    globals()[name] = val
+    return val
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals().keys(), *__all__])
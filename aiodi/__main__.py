@@ -0,0 +1,104 @@
+"""
+Inspect the container built from configuration files.
+
+e.g.
+python -m aiodi --cwd . --filename pyproject.toml graph --format dot
+python -m aiodi --json critical-path
+"""
+
+from argparse import ArgumentParser, Namespace
+from json import dumps
+from os.path import abspath
+from sys import path as sys_path
+from time import perf_counter
+from typing import Any
+
+from .builder import ContainerBuilder
+from .container import Container
+from .instrument import IMPORT, PHASE, SERVICE, TraceRecorder
+
+
+def _parser() -> ArgumentParser:
+    parser = ArgumentParser(prog='python -m aiodi', description='Inspect the aiodi container of a project.')
+    parser.add_argument('--cwd', default=None, help='directory to look for configuration files (default: current)')
+    parser.add_argument(
+        '--filename',
+        dest='filenames',
+        action='append',
+        default=None,
+        help='configuration file relative to cwd, repeatable (default: pyproject.toml, services.toml, aiodi.toml)',
+    )
+    parser.add_argument('--environment', default=None, help='environment overlay to load')
+    parser.add_argument('--tool-key', default='aiodi', help='table name under [tool] (default: aiodi)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    parser.add_argument('--trace', default=None, help='also write a Chrome trace-event JSON file')
+
+    commands = parser.add_subparsers(dest='command', required=True)
+    graph = commands.add_parser('graph', help='print the dependency graph')
+    graph.add_argument('--format', choices=('text', 'dot'), default='text')
+    commands.add_parser('critical-path', help='print the most expensive chain of service constructions')
+    commands.add_parser('unreferenced', help='print services no other service depends on')
+    phases = commands.add_parser('phases', help='print the startup time per phase and the slowest services')
+    phases.add_argument('--top', type=int, default=10)
+    return parser
+
+
+def _load(args: Namespace, recorder: TraceRecorder) -> tuple[Container, float]:
+    cwd = abspath(args.cwd or '.')
+    if cwd not in sys_path:
+        sys_path.insert(0, cwd)
+    start = perf_counter()
+    container = ContainerBuilder(
+        filenames=args.filenames,
+        cwd=cwd,
+        tool_key=args.tool_key,
+        environment=args.environment,
+        instrument=recorder,
+    ).load()
+    return container, perf_counter() - start
+
+
+def _run(args: Namespace, container: Container, elapsed: float, recorder: TraceRecorder) -> tuple[Any, str]:
+    graph = container.plan.graph  # type: ignore
+    if args.command == 'graph':
+        return graph.to_dict(), graph.to_dot() if args.format == 'dot' else graph.to_text()
+    if args.command == 'critical-path':
+        keys, total = graph.critical_path(durations=recorder.durations(kind=SERVICE))
+        return (
+            {'path': keys, 'seconds': total},
+            '\n'.join(['{0:>10.3f} ms  {1}'.format(recorder.durations().get(key, 0.0) * 1e3, key) for key in keys])
+            + '\n{0:>10.3f} ms  total'.format(total * 1e3),
+        )
+    if args.command == 'unreferenced':
+        keys = graph.unreferenced()
+        return keys, '\n'.join(keys)
+    phases = recorder.durations(kind=PHASE)
+    imports = sum(recorder.durations(kind=IMPORT).values())
+    services = recorder.summary(top=args.top, kind=SERVICE)
+    return (
+        {'total': elapsed, 'phases': phases, 'imports': imports, 'services': dict(services)},
+        '\n'.join(
+            [
+                *['{0:>10.3f} ms  {1}'.format(val * 1e3, key) for key, val in phases.items()],
+                '{0:>10.3f} ms  (imports)'.format(imports * 1e3),
+                '{0:>10.3f} ms  total'.format(elapsed * 1e3),
+                '',
+                *['{0:>10.3f} ms  {1}'.format(val * 1e3, key) for key, val in services],
+            ]
+        ),
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parser().parse_args(argv)
+    recorder = TraceRecorder()
+    container, elapsed = _load(args=args, recorder=recorder)
+    if args.trace:
+        recorder.write(args.trace)
+    data, text = _run(args=args, container=container, elapsed=elapsed, recorder=recorder)
+    print(dumps(data, indent=2) if args.json else text)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
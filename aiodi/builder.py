@@ -1,9 +1,29 @@
+from concurrent.futures import (
+    FIRST_EXCEPTION,
+    Executor,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextvars import copy_context
 from pathlib import Path
 from random import shuffle
 from typing import Any, Callable, MutableMapping
 
 from .container import Container
+from .graph import ServiceGraph
+from .instrument import (
+    PHASE,
+    POSTPONE,
+    RETRY,
+    Instrument,
+    current_instrument,
+    event,
+    instrumented,
+    span,
+)
 from .logger import logger
+from .plan import BuildPlan
 from .resolver import Resolver, ValueResolutionPostponed
 from .resolver.loader import LoadData, LoaderResolver, prepare_loader_to_parse
 from .resolver.path import PathResolver, prepare_path_to_parse
@@ -13,13 +33,16 @@ from .resolver.service import (
     prepare_services_to_parse,
 )
 from .resolver.variable import VariableResolver, prepare_variables_to_parse
-from .toml import TOMLDecoder, lazy_toml_decoder
+from .toml import TOMLDecoder, cached_toml_decoder, lazy_toml_decoder
 
 
 class ContainerBuilder:
     _filenames: list[str]
     _cwd: str | None
     _debug: bool
+    _environment: str | None
+    _var_key: str
+    _instrument: Instrument | None
     _resolvers: dict[str, Resolver[Any, Any]]
     _decoders: dict[str, Callable[[str | Path], MutableMapping[str, Any] | dict[str, Any]]]
     _map_items: Callable[[dict[str, dict[str, Any]]], list[tuple[str, Any, dict[str, Any]]]]
@@ -33,6 +56,8 @@ class ContainerBuilder:
         tool_key: str = 'aiodi',
         var_key: str = 'env',  # Container retro-compatibility
         toml_decoder: TOMLDecoder | None = None,
+        environment: str | None = None,
+        instrument: Instrument | None = None,
     ) -> None:
         self._filenames = (
             [
@@ -48,28 +73,47 @@ class ContainerBuilder:
         )
         self._cwd = None if len(cwd or '') == 0 else cwd
         self._debug = debug
+        self._environment = None if len(environment or '') == 0 else environment
+        self._instrument = instrument
         self._resolvers = {
             'loader': LoaderResolver(),
             'path': PathResolver(),
             'service': ServiceResolver(),
             'variable': VariableResolver(),
         }
+        decode_toml = cached_toml_decoder(toml_decoder or lazy_toml_decoder())
         self._decoders = {
-            'toml': lambda path: (toml_decoder or lazy_toml_decoder())(path).get('tool', {}).get(tool_key, {}),
+            'toml': lambda path: decode_toml(path).get('tool', {}).get(tool_key, {}),
         }
 
+        self._var_key = str('env' if var_key is None or len(var_key) == 0 else var_key)
+
         def map_items(items: dict[str, dict[str, Any]]) -> list[tuple[str, Any, dict[str, Any]]]:
             return [
                 (key, val, {})
                 for key, val in {
-                    str('env' if var_key is None or len(var_key) == 0 else var_key): items['variables'],
+                    self._var_key: items['variables'],
                     **items['services'],
                 }.items()
             ]
 
         self._map_items = map_items
 
-    def load(self) -> Container:
+    def load(self, executor: Executor | None = None, max_workers: int | None = None) -> Container:
+        """
+        Build the container. Given an executor or max_workers, independent services of each dependency level are
+        constructed concurrently (except those with "threadsafe = false", constructed in the calling thread).
+
+        :param executor: executor to construct services on
+        :param max_workers: size of a ThreadPoolExecutor created for this call when no executor is given
+        """
+        with instrumented(self._instrument or current_instrument()):
+            if executor is None and max_workers is not None:
+                with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='aiodi') as pool:
+                    return self._load(executor=pool)
+            return self._load(executor=executor)
+
+    def _load(self, executor: Executor | None) -> Container:
         extra: dict[str, Any] = {
             'path_data': {},
             'data': {},
@@ -79,48 +123,139 @@ class ContainerBuilder:
             'services': {},
         }
 
-        self._parse_values(
-            resolver=self._resolvers['path'],
-            storage=extra['path_data'],
-            extra=extra,
-            items=prepare_path_to_parse(
-                resolver=self._resolvers['path'], items={'cwd': self._cwd, 'filenames': self._filenames}, extra=extra
-            ),
-        )
+        with span(PHASE, 'path'):
+            self._parse_values(
+                resolver=self._resolvers['path'],
+                storage=extra['path_data'],
+                extra=extra,
+                items=prepare_path_to_parse(
+                    resolver=self._resolvers['path'],
+                    items={'cwd': self._cwd, 'filenames': self._filenames},
+                    extra=extra,
+                ),
+            )
         extra['path_data'] = extra['path_data']['value']
 
-        self._parse_values(
-            resolver=self._resolvers['loader'],
-            storage=extra['data'],
-            extra=extra,
-            items=prepare_loader_to_parse(
+        with span(PHASE, 'loader'):
+            self._parse_values(
                 resolver=self._resolvers['loader'],
-                items={'path_data': extra['path_data'], 'decoders': self._decoders},
+                storage=extra['data'],
                 extra=extra,
-            ),
-        )
+                items=prepare_loader_to_parse(
+                    resolver=self._resolvers['loader'],
+                    items={
+                        'path_data': extra['path_data'],
+                        'decoders': self._decoders,
+                        'environment': self._environment,
+                    },
+                    extra=extra,
+                ),
+            )
         data: LoadData = extra['data']['value']
         extra['data'] = data
 
         extra['_service_defaults'] = data.service_defaults
+        extra['project_dir'] = data.service_defaults.project_dir
 
-        self._parse_values(
-            resolver=self._resolvers['variable'],
-            storage=extra['variables'],
-            extra=extra,
-            items=prepare_variables_to_parse(resolver=self._resolvers['variable'], items=data.variables, extra=extra),
-        )
+        with span(PHASE, 'variable'):
+            self._parse_values(
+                resolver=self._resolvers['variable'],
+                storage=extra['variables'],
+                extra=extra,
+                items=prepare_variables_to_parse(
+                    resolver=self._resolvers['variable'], items=data.variables, extra=extra
+                ),
+            )
 
-        self._parse_values(
-            resolver=self._resolvers['service'],
-            storage=extra['services'],
-            extra=extra,
-            items=prepare_services_to_parse(resolver=self._resolvers['service'], items=data.services, extra=extra),
-        )
+        with span(PHASE, 'service'):
+            services = prepare_services_to_parse(resolver=self._resolvers['service'], items=data.services, extra=extra)
+            plan = BuildPlan.from_services(
+                variables=extra['variables'],
+                services={key: metadata for key, (metadata, _) in services.items()},
+                variables_key=self._var_key,
+                variable_sources=data.variables,
+            )
+            extra['tags'] = plan.tags
+            extra['cached_services'] = plan.cached_services
+            items = dict(services)
+            if executor is not None and plan.graph.is_complete():
+                self._construct_levels(
+                    resolver=self._resolvers['service'],
+                    graph=plan.graph,
+                    executor=executor,
+                    storage=extra['services'],
+                    extra=extra,
+                    items=items,
+                )
+            self._parse_values(
+                resolver=self._resolvers['service'],
+                storage=extra['services'],
+                extra=extra,
+                items=items,
+            )
 
-        return Container(
+        container = Container(
             items=self._map_items({'variables': extra['variables'], 'services': extra['services']})  # type: ignore
         )
+        container.plan = plan._replace(order=tuple(extra['services'].keys()))
+        return container
+
+    @staticmethod
+    def _construct_levels(
+        *,
+        resolver: Resolver[Any, Any],
+        graph: ServiceGraph,
+        executor: Executor,
+        storage: dict[str, Any],
+        extra: dict[str, Any],
+        items: dict[str, Any],
+    ) -> None:
+        """
+        Construct services level by level, storing each level in declaration order once all of it is built.
+        The first failure cancels pending constructions and is raised, a postponement keeps what was built and leaves
+        the remaining items to the sequential resolution.
+        """
+        try:
+            levels = graph.levels()
+        except ValueError:
+            return
+        for level in levels:
+            keys = [key for key in level if key in items]
+            futures: dict[str, Future[Any]] = {
+                key: executor.submit(copy_context().run, resolver.parse_value, items[key][0], 0, extra)
+                for key in keys
+                if items[key][0].threadsafe
+            }
+            results: dict[str, Any] = {}
+            postponed = False
+            try:
+                for key in keys:
+                    if key not in futures:
+                        results[key] = resolver.parse_value(metadata=items[key][0], retries=0, extra=extra)
+                done, _ = wait(futures.values(), return_when=FIRST_EXCEPTION)
+                failures = [future for future in futures.values() if future in done and future.exception()]
+                if failures:
+                    raise failures[0].exception()  # type: ignore
+            except ValueResolutionPostponed:
+                postponed = True
+            finally:
+                for future in futures.values():
+                    future.cancel()
+            # constructions already running complete anyway, so their instances are kept rather than built twice
+            wait(futures.values())
+            results.update(
+                {
+                    key: future.result()
+                    for key, future in futures.items()
+                    if not future.cancelled() and future.exception() is None
+                }
+            )
+            for key in keys:
+                if key in results:
+                    storage.setdefault(key, results[key])
+                    del items[key]
+            if postponed:
+                return
 
     def _parse_values(
         self,
@@ -133,10 +268,13 @@ class ContainerBuilder:
         while len(items.keys()) > 0:
             try:
                 for name, (metadata, times) in items.items():
+                    if times > 0 and name not in storage:
+                        event(RETRY, name, times=times)
                     storage.setdefault(name, resolver.parse_value(metadata=metadata, retries=times, extra=extra))
             except ValueResolutionPostponed as err:
                 if self._debug:
                     logger.debug(str(err))
+                event(POSTPONE, getattr(err.value(), 'name', err.key()), waiting_for=err.key(), times=err.times())
                 if err.times() == limit_retries:
                     raise InterruptedError('Reached limit of retries ({0}) per <{1}>!'.format(limit_retries, err.key()))
                 if err.key() not in items:
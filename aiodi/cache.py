@@ -0,0 +1,170 @@
+from collections import OrderedDict
+from functools import update_wrapper
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Hashable, NamedTuple
+
+_KWARGS = object()
+
+
+class CacheOptions(NamedTuple):
+    maxsize: int | None = 128  # entries kept, least recently used first out, None for unbounded
+    ttl: float | None = None  # seconds an entry is kept, None for ever
+    single_flight: bool = True  # concurrent calls of a coroutine method with the same arguments share one call
+
+    @classmethod
+    def from_value(cls, name: str, val: Any) -> 'CacheOptions':
+        """e.g. { maxsize = 10000, ttl = 60 }"""
+        if not isinstance(val, dict) or not set(val.keys()).issubset(cls._fields):
+            raise ValueError(
+                'Method <{0}> cache must be a table of {1}, e.g. {{ maxsize = 1000, ttl = 60 }}'.format(
+                    name, ', '.join(cls._fields)
+                )
+            )
+        maxsize, ttl = val.get('maxsize', 128), val.get('ttl')
+        if (maxsize is not None and int(maxsize) < 1) or (ttl is not None and float(ttl) <= 0):
+            raise ValueError('Method <{0}> cache maxsize and ttl must be positive'.format(name))
+        return cls(
+            maxsize=None if maxsize is None else int(maxsize),
+            ttl=None if ttl is None else float(ttl),
+            single_flight=bool(val.get('single_flight', True)),
+        )
+
+
+class MethodCache:
+    """
+    LRU/TTL memoization of a bound method, keyed by its arguments (calls with unhashable arguments are not cached).
+
+    e.g.
+    find = MethodCache(repository.find, CacheOptions(maxsize=1000, ttl=60))
+    find('42')
+    find.stats()  # {'hits': 0, 'misses': 1, 'coalesced': 0, 'evictions': 0, 'size': 1, 'maxsize': 1000}
+    """
+
+    def __init__(self, fn: Callable[..., Any], options: CacheOptions = CacheOptions()) -> None:
+        update_wrapper(self, fn)
+        self._fn = fn
+        self._options = options
+        self._entries: OrderedDict[Hashable, tuple[Any, float | None]] = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+
+    @staticmethod
+    def _key(args: tuple[Any, ...], kwargs: dict[str, Any]) -> Hashable | None:
+        key = (*args, _KWARGS, *sorted(kwargs.items())) if kwargs else args
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _get(self, key: Hashable) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] is None or entry[1] > monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return True, entry[0]
+                del self._entries[key]
+            self._misses += 1
+        return False, None
+
+    def _put(self, key: Hashable, val: Any) -> None:
+        ttl = self._options.ttl
+        with self._lock:
+            self._entries[key] = (val, None if ttl is None else monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while self._options.maxsize is not None and len(self._entries) > self._options.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        key = self._key(args, kwargs)
+        if key is None:
+            return self._fn(*args, **kwargs)
+        found, val = self._get(key)
+        if not found:
+            val = self._fn(*args, **kwargs)
+            self._put(key, val)
+        return val
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int | None]:
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'coalesced': self._coalesced,
+                'evictions': self._evictions,
+                'size': len(self._entries),
+                'maxsize': self._options.maxsize,
+            }
+
+
+class AsyncMethodCache(MethodCache):
+    """
+    MethodCache of a coroutine method. With single_flight, concurrent misses with the same arguments in a loop await
+    one shared call (counted as coalesced), which completes even if its first caller is cancelled.
+    """
+
+    def __init__(self, fn: Callable[..., Any], options: CacheOptions = CacheOptions()) -> None:
+        super().__init__(fn, options)
+        self._flights: dict[tuple[Any, Hashable], Any] = {}
+
+    async def _fill(self, key: Hashable, args: tuple[Any, ...], kwargs: dict[str, Any]) -> Any:
+        val = await self._fn(*args, **kwargs)
+        self._put(key, val)
+        return val
+
+    async def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        from asyncio import get_running_loop, shield
+
+        key = self._key(args, kwargs)
+        if key is None:
+            return await self._fn(*args, **kwargs)
+        found, val = self._get(key)
+        if found:
+            return val
+        if not self._options.single_flight:
+            return await self._fill(key, args, kwargs)
+        loop = get_running_loop()
+        flight = self._flights.get((loop, key))
+        if flight is None:
+            flight = self._flights[(loop, key)] = loop.create_task(self._fill(key, args, kwargs))
+            flight.add_done_callback(lambda _: self._flights.pop((loop, key), None))
+        else:
+            with self._lock:
+                self._coalesced += 1
+        return await shield(flight)
+
+
+def intercept(instance: Any, caches: dict[str, CacheOptions]) -> Any:
+    """Replace the given methods of instance by cached ones, the instance keeps its identity and type."""
+    from inspect import iscoroutinefunction
+
+    for name, options in caches.items():
+        method = getattr(instance, name)
+        cache = (AsyncMethodCache if iscoroutinefunction(method) else MethodCache)(method, options)
+        try:
+            setattr(instance, name, cache)
+        except AttributeError:
+            raise TypeError(
+                'Method <{0}> of <{1}> can not be cached, its instances do not accept attributes'.format(
+                    name, type(instance).__name__
+                )
+            )
+    return instance
+
+
+def cache_stats(instance: Any) -> dict[str, dict[str, int | None]]:
+    """Stats of the cached methods of an instance, by method name."""
+    return {
+        name: val.stats() for name, val in getattr(instance, '__dict__', {}).items() if isinstance(val, MethodCache)
+    }
@@ -0,0 +1,79 @@
+from threading import Lock
+from types import MethodType, NoneType, UnionType
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple, Union, get_args, get_origin
+from weakref import WeakKeyDictionary
+
+from .helpers import fqdn, is_primitive
+from .tags import collection_item_type
+
+if TYPE_CHECKING:  # pragma: no cover
+    from inspect import Parameter
+
+
+class CallParameter(NamedTuple):
+    name: str
+    key: str | None  # container key of the annotated type
+    cast: type | None  # primitive annotation, given values are cast to
+    optional: bool
+    collection: type | None  # T of list[T], Iterable[T]..., every service providing T is given
+    required: bool
+
+
+class CallPlan(NamedTuple):
+    """How to fill the parameters of a function from a container, computed once per function."""
+
+    parameters: tuple[CallParameter, ...]
+    names: tuple[str, ...]
+
+    @classmethod
+    def from_callable(cls, fn: Callable[..., Any]) -> 'CallPlan':
+        from inspect import Parameter, signature
+
+        target = fn.__func__ if isinstance(fn, MethodType) else fn
+        params = list(signature(target).parameters.values())
+        if target is not fn:
+            params = params[1:]
+        parameters = tuple(
+            cls._parameter(param)
+            for param in params
+            if param.kind not in (Parameter.VAR_POSITIONAL, Parameter.VAR_KEYWORD)
+        )
+        return cls(parameters=parameters, names=tuple(param.name for param in parameters))
+
+    @staticmethod
+    def _parameter(param: 'Parameter') -> CallParameter:
+        typ = None if param.annotation is param.empty else param.annotation
+        optional = get_origin(typ) in (Union, UnionType) and any(arg is NoneType for arg in get_args(typ))
+        if optional:
+            typ = next(arg for arg in get_args(typ) if arg is not NoneType)
+        item_type = collection_item_type(typ)
+        item_type = None if item_type is None or is_primitive(item_type) else item_type
+        primitive = isinstance(typ, type) and is_primitive(typ)
+        return CallParameter(
+            name=param.name,
+            key=fqdn(item_type) if item_type else fqdn(typ) if isinstance(typ, type) and not primitive else None,
+            cast=typ if primitive else None,
+            optional=optional,
+            collection=item_type,
+            required=param.default is param.empty,
+        )
+
+
+# plans of functions, and of the underlying functions of bound methods (without their first parameter)
+_plans: 'dict[bool, WeakKeyDictionary[Callable[..., Any], CallPlan]]' = {
+    False: WeakKeyDictionary(),
+    True: WeakKeyDictionary(),
+}
+_plans_lock = Lock()
+
+
+def call_plan(fn: Callable[..., Any]) -> CallPlan:
+    """The cached plan of a function (of the underlying function for bound methods)."""
+    target = fn.__func__ if isinstance(fn, MethodType) else fn
+    bound = target is not fn
+    plan = _plans[bound].get(target)
+    if plan is None:
+        plan = CallPlan.from_callable(fn)
+        with _plans_lock:
+            _plans[bound][target] = plan
+    return plan
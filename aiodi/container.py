@@ -1,18 +1,38 @@
-from inspect import signature
+import gc
+import os
+from functools import partial
+from time import perf_counter
 from typing import (
+    TYPE_CHECKING,
     AbstractSet,
     Any,
     Callable,
     Dict,
+    Iterable,
     Optional,
+    Set,
     Type,
     TypeVar,
     Union,
     cast,
 )
+from weakref import WeakValueDictionary
 
-from .helpers import is_object, is_optional, is_primitive, primitives
-from .logger import logger
+from .cache import cache_stats
+from .call import call_plan
+from .frozen import FrozenContainer
+from .helpers import fqdn, is_object, is_optional, is_primitive, primitives
+from .instrument import POSTPONE, SERVICE, event, span
+from .logger import get_logger
+from .metrics import ContainerMetrics
+from .provider import Provider
+from .scope import CachedService, LazyService, ScopedService, ServiceLRU, constructions
+from .tags import TaggedServices
+from .warmup import Warmup
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .plan import BuildPlan
+    from .snapshot import ContainerSnapshot
 
 _T = TypeVar('_T')
 
@@ -21,6 +41,10 @@ ContainerKey = str | Type[Any] | object
 
 class Container(Dict[Any, Any]):
     debug: bool = False
+    plan: Optional['BuildPlan'] = None
+    _owned: Optional[Set[int]] = None  # ids of nested dicts owned by a copy-on-write container
+    _metrics: Optional[ContainerMetrics] = None
+    _version: int = 0  # changed by set, so providers bound to a value look it up again
     _parameter_resolvers: list[Callable[['Container'], Any]] = []
 
     def __init__(
@@ -51,13 +75,13 @@ class Container(Dict[Any, Any]):
                 # Check if already exist
                 if item[0] in self or item[1] in self:
                     if self.debug:
-                        logger.debug('Ignoring {0} - {1}'.format(item[0], item[1]))
+                        get_logger().debug('Ignoring {0} - {1}'.format(item[0], item[1]))
                     del items_[index]
                     continue
                 # Resolve 2nd arg if is a primitive or instance
                 if not isinstance(item[1], type) and len(item[2].keys()) == 0:
                     if self.debug:
-                        logger.debug('Adding {0} - {1}'.format(item[0], item[1]))
+                        get_logger().debug('Adding {0} - {1}'.format(item[0], item[1]))
                     self.set(item[0], item[1])
                     del items_[index]
                     continue
@@ -65,13 +89,241 @@ class Container(Dict[Any, Any]):
                 kwargs = self._resolve_or_postpone_item(item, items_)
                 if kwargs is not None:
                     if self.debug:
-                        logger.debug('Resolving {0}'.format(item[1]))
-                    inst = item[1](**kwargs)
+                        get_logger().debug('Resolving {0}'.format(item[1]))
+                    with span(SERVICE, fqdn(item[0])):
+                        inst = item[1](**kwargs)
                     if self.debug:
-                        logger.debug('Adding {0} - {1}'.format(item[0], item[1]))
+                        get_logger().debug('Adding {0} - {1}'.format(item[0], item[1]))
                     self.set(item[0], inst)
                     del items_[index]
 
+    def prefork(self, freeze: bool = True) -> None:
+        """
+        Share this container with forked workers (e.g. Gunicorn or uvicorn with preload): services declared with
+        "fork_safe = false" or a "post_fork" re-factory, and their dependents, are rebuilt in every child process.
+        With freeze, a collection is run and surviving objects are moved to the permanent generation (gc.freeze) so
+        the garbage collector does not touch, and copy, the memory pages shared with children.
+        """
+        if self.plan is None:
+            raise ValueError('Only containers built by ContainerBuilder can be prepared to fork')
+        _preforked[id(self)] = self
+        if freeze:
+            gc.collect()
+            gc.freeze()
+
+    def reinit_after_fork(self) -> None:
+        """
+        Rebuild services which must not survive fork(), and their dependents, in dependency order. If one fails, the
+        error is raised and those not rebuilt yet raise it on lookup instead of handing out their inherited instance.
+        """
+        if self.plan is None:
+            return
+        plan = self.plan
+        keys = plan.graph.transitive_dependents(
+            [key for key, metadata in plan.services.items() if not metadata.fork_safe]
+        )
+        rebuilt: set[str] = set()
+
+        def construct(key: str, services: dict[str, Any]) -> Any:
+            post_fork = plan.services[key].post_fork
+            val = post_fork(self._lookup(key)) if post_fork else plan.construct(key=key, services=services)
+            rebuilt.add(key)
+            return val
+
+        try:
+            self._rebuild(keys=keys, construct=construct)
+        except Exception as err:
+            for key in keys - rebuilt:
+                self.set(key, _UnusableService(key=key, error=err, typ=plan.services[key].type))
+            raise
+
+    def derive(
+        self, services: dict[ContainerKey, Any] | None = None, variables: dict[str, Any] | None = None
+    ) -> 'Container':
+        """
+        A new container sharing every service of this one by reference, except the given service overrides, the
+        services using the given variable overrides (or variables referencing them) and, transitively, their
+        dependents, which are rebuilt.
+        Services are overridden by key, or by a type provided by a single service (e.g. an interface).
+        Nested dicts are only copied along the overridden keys, so this one is never mutated.
+        e.g.
+        tenant = container.derive(services={Credentials: tenant_credentials}, variables={'db_name': 'tenant_a'})
+        """
+        services = services or {}
+        variables = variables or {}
+        derived = Container(dict(self), debug=self.debug)
+        derived._owned = set()
+        if self.plan is None:
+            if len(variables) > 0:
+                raise ValueError('Only containers built by ContainerBuilder can override variables')
+            for key, val in services.items():
+                derived.set(fqdn(key), val)
+            return derived
+
+        overrides = {self.plan.service_key(key): val for key, val in services.items()}
+        variables = self.plan.resolve_variables(variables)
+        plan = self.plan._replace(variables={**self.plan.variables, **variables}, cached_services=ServiceLRU())
+        derived.plan = plan
+        keys = plan.graph.transitive_dependents([*overrides.keys(), *plan.services_using(variables.keys())])
+        for name, val in variables.items():
+            derived.set('{0}.{1}'.format(plan.variables_key, name), val)
+        for key, val in overrides.items():
+            derived.set(key, val)
+        for key in plan.services.keys() - keys - overrides.keys():
+            val = derived._lookup(key)
+            if isinstance(val, CachedService):  # kept in the LRU of the derived container
+                derived.set(key, val.bind(cast(ServiceLRU, plan.cached_services)))
+        derived._rebuild(keys=keys.difference(overrides.keys()), construct=plan.construct)
+        return derived
+
+    def snapshot(self) -> 'ContainerSnapshot':
+        """
+        A picklable description of how this container was built, to load it again in other processes, e.g. workers
+        of a spawn-mode process pool (see worker_initializer).
+        e.g.
+        snapshot = container.snapshot()
+        container = snapshot.load()  # in another process
+        """
+        if self.plan is None:
+            raise ValueError('Only containers built by ContainerBuilder can be snapshotted')
+        from .snapshot import ContainerSnapshot
+
+        return ContainerSnapshot.from_plan(self.plan)
+
+    def freeze(self) -> FrozenContainer:
+        """
+        e.g.
+        container = ContainerBuilder().load().freeze()
+        container.get(MyClass)  # same lookups, but mutations raise TypeError and no build metadata is kept
+        """
+        return FrozenContainer(self)
+
+    def fork(self) -> 'Container':
+        """
+        A copy-on-write view of this container, e.g. per test: setting keys on it never mutates this one.
+        e.g.
+        forked = container.fork()
+        forked.set('config.environment', 'test')
+        """
+        return self.derive()
+
+    def override(self, services: dict[ContainerKey, Any], variables: dict[str, Any] | None = None) -> 'Container':
+        """
+        A copy-on-write view of this container with the given services (and variables) replaced and their
+        dependents rebuilt.
+        e.g.
+        forked = container.override({UserRepository: FakeUserRepository()})  # replaces the UserRepository provider
+        """
+        return self.derive(services=services, variables=variables)
+
+    def tagged(self, name: str) -> TaggedServices:
+        """
+        Services tagged with name, by descending priority, scoped ones being resolved when reached.
+        e.g.
+        for handler in container.tagged('event_handler'):
+            handler(event)
+        """
+        if self.plan is None:
+            raise ValueError('Only containers built by ContainerBuilder have tagged services')
+        return TaggedServices((key, self._lookup(key)) for key in self.plan.tags.tagged(name))
+
+    def cache_stats(self) -> dict[str, dict[str, dict[str, int | None]]]:
+        """
+        Stats of the cached methods of each service declaring "cache" (scoped services keep a cache per instance and
+        are not reported).
+        e.g.
+        container.cache_stats()  # {'app.UserRepository': {'find': {'hits': 12, 'misses': 3, ...}}}
+        """
+        if self.plan is None:
+            raise ValueError('Only containers built by ContainerBuilder have cached methods')
+        services = {key: self._lookup(key) for key, metadata in self.plan.services.items() if metadata.cache}
+        return {key: cache_stats(val) for key, val in services.items() if not isinstance(val, ScopedService)}
+
+    def cached_services(self) -> ServiceLRU:
+        """
+        The LRU of the instances of its cached scoped services (derived containers have their own).
+        e.g.
+        container.cached_services().evict()  # e.g. on memory pressure, returns the estimated bytes released
+        """
+        if self.plan is None or self.plan.cached_services is None:
+            raise ValueError('Only containers built by ContainerBuilder have cached services')
+        return self.plan.cached_services
+
+    def call(self, fn: Callable[..., _T], *args: Any, **kwargs: Any) -> _T:
+        """
+        Call fn with its parameters annotated with a service type (or a collection of them) injected, unless given.
+        Given values for parameters annotated with a primitive type are cast to it. Inspection of fn is done once.
+        e.g.
+        container.call(get_user, user_id='42')  # def get_user(user_id: int, finder: UserFinderService)
+        """
+        plan = call_plan(fn)
+        given = plan.names[: len(args)]
+        for param in plan.parameters:
+            if param.name in kwargs:
+                if param.cast is not None and not isinstance(kwargs[param.name], param.cast):
+                    kwargs[param.name] = param.cast(kwargs[param.name])
+            elif param.key is None or param.name in given:
+                continue
+            elif param.collection is not None:
+                kwargs[param.name] = self._providers(param.collection)
+            elif param.required and not param.optional:
+                kwargs[param.name] = self.get(param.key)
+            elif param.key in self:
+                kwargs[param.name] = self.get(param.key)
+            elif param.required:
+                kwargs[param.name] = None
+        return fn(*args, **kwargs)
+
+    def partial(self, fn: Callable[..., _T]) -> Callable[..., _T]:
+        """
+        e.g.
+        handler = container.partial(get_user)
+        handler(user_id='42')  # same as container.call(get_user, user_id='42')
+        """
+        return partial(self.call, fn)
+
+    def _providers(self, typ: Type[Any]) -> TaggedServices:
+        if self.plan is None:
+            instances: list[Any] = self.get(typ, instance_of=True)
+            return TaggedServices((fqdn(val), val) for val in instances)
+        return TaggedServices((key, self._lookup(key)) for key in self.plan.tags.providers(typ))
+
+    def enable_metrics(self, metrics: ContainerMetrics | None = None) -> ContainerMetrics:
+        """
+        Count lookups (get and "in") per key with their latencies, until disabled. A disabled container keeps its
+        plain class, so lookups have no overhead at all.
+        e.g.
+        metrics = container.enable_metrics()
+        metrics.to_prometheus()
+        """
+        if metrics is None:
+            metrics = ContainerMetrics(services=self.plan.services.keys() if self.plan is not None else None)
+        self._metrics = metrics
+        self.__class__ = _metered_class(self.__class__)
+        return metrics
+
+    def disable_metrics(self) -> None:
+        self.__class__ = getattr(self.__class__, '_unmetered', self.__class__)
+        self._metrics = None
+
+    def warmup(self, keys: Iterable[str] | None = None) -> Warmup:
+        """
+        Start constructing lazy services in background: those declaring "warmup" by default (higher priority first),
+        or the given keys, each one after its dependencies.
+        e.g.
+        warmup = container.warmup()
+        warmup.wait(timeout=30)  # True once every service is constructed
+        """
+        if self.plan is None:
+            raise ValueError('Only containers built by ContainerBuilder can be warmed up')
+        if keys is None:
+            marked = {
+                key: metadata.warmup for key, metadata in self.plan.services.items() if metadata.warmup is not None
+            }
+            keys = sorted(marked, key=lambda key: -marked[key])
+        services = [(key, self._lookup(key)) for key in self.plan.graph.order(keys)]
+        return Warmup([(key, val) for key, val in services if isinstance(val, LazyService)]).start()
+
     def set(self, key: ContainerKey, val: _T = ...) -> None:  # type: ignore
         """
         e.g. 1
@@ -89,10 +341,13 @@ class Container(Dict[Any, Any]):
         if is_object(key):
             val = key  # type: ignore
             key = '{0}.{1}'.format(key.__class__.__module__, key.__class__.__name__)
+        if self._owned is not None:
+            self._own_paths(keys=[cast(str, key)])
         keys = cast(str, key).split('.')
         for key in keys[:-1]:
             here = here.setdefault(key, {})
         here[keys[-1]] = val
+        self._version += 1
 
     def get(self, key: ContainerKey, typ: Type[_T] | None = None, instance_of: bool = False) -> _T:  # type: ignore
         """
@@ -105,17 +360,41 @@ class Container(Dict[Any, Any]):
         container = Container({'config': {'version': '0.1.0'})
         container.get('config.version', typ=str)  # Checks type
         """
-        here = self
         if instance_of:
             key: Type[Any] = key if isinstance(key, type) else type(key) if is_object(key) else None  # type: ignore
             if not key:
                 raise ValueError('key parameter must be a type or object non-primitive to use instance_of parameter')
-            return self._get_instance_of(here, key)  # type: ignore
-        if isinstance(key, type):
+            return self._get_instance_of(self, key)  # type: ignore
+        if isinstance(key, type) or is_object(key):
+            typ = None
+        val = self._lookup(key)
+        if isinstance(val, ScopedService):
+            val = val.resolve()
+        return self._check_type(key, val, typ)
+
+    def provider(self, key: ContainerKey, typ: Type[_T] | None = None) -> Provider[_T]:
+        """
+        A callable returning what get(key, typ) would, without looking the key up on each call, e.g. in hot paths.
+        e.g.
+        finder = container.provider(UserFinderService)
+        finder()  # UserFinderService
+        """
+        if isinstance(key, type) or is_object(key):
             typ = None
+        return Provider(self, key, typ)
+
+    @staticmethod
+    def _check_type(key: ContainerKey, val: Any, typ: Type[_T] | None) -> _T:
+        if typ and not isinstance(val, (typ,)):
+            raise TypeError('<{0}: {1}> does not exist in container'.format(key, typ.__name__))
+        return val  # type: ignore
+
+    def _lookup(self, key: ContainerKey) -> Any:
+        """The value kept for a key, scoped services are not resolved."""
+        here = self
+        if isinstance(key, type):
             key = '{0}.{1}'.format(key.__module__, key.__name__)
         if is_object(key):
-            typ = None
             key = '{0}.{1}'.format(key.__class__.__module__, key.__class__.__name__)
         if not isinstance(key, str):
             raise KeyError('<{0}> does not exist in container'.format(key))
@@ -125,10 +404,7 @@ class Container(Dict[Any, Any]):
             if key in here and isinstance(here[key], dict):
                 here = here[key]
         try:
-            val = here[keys[-1]]
-            if typ and not isinstance(val, (typ,)):
-                raise TypeError('<{0}: {1}> does not exist in container'.format(original_key, typ.__name__))
-            return val  # type: ignore
+            return here[keys[-1]]
         except KeyError:
             raise KeyError('<{0}> does not exist in container'.format(original_key))
 
@@ -143,11 +419,35 @@ class Container(Dict[Any, Any]):
         'config.foo' in container # False
         """
         try:
-            self.get(o[0])
+            self._lookup(o[0])
             return True
         except (IndexError, KeyError, TypeError):
             return False
 
+    def _rebuild(self, keys: Iterable[str], construct: Callable[[str, dict[str, Any]], Any]) -> None:
+        """Construct keys again in dependency order, passing only what each one depends on."""
+        graph = cast('BuildPlan', self.plan).graph
+        services: dict[str, Any] = {}
+        for key in graph.order(keys):
+            services.update({dep: self._lookup(dep) for dep in graph.dependencies(key) if dep not in services})
+            services[key] = construct(key, services)
+            self.set(key, services[key])
+
+    def _own_paths(self, keys: Iterable[str]) -> None:
+        """Copy nested dicts along keys, once, so setting them does not mutate dicts shared with other containers."""
+        owned = cast(Set[int], self._owned)
+        for key in keys:
+            here: dict[str, Any] = self
+            for part in key.split('.')[:-1]:
+                child = dict.get(here, part)
+                if not isinstance(child, dict):
+                    break
+                if id(child) not in owned:
+                    child = dict(child)
+                    here[part] = child
+                    owned.add(id(child))
+                here = child
+
     @staticmethod
     def _sanitize_item_before_resolve(
         item: Union[ContainerKey, tuple[ContainerKey, _T, dict[str, Any]]]
@@ -168,6 +468,8 @@ class Container(Dict[Any, Any]):
         item: tuple[ContainerKey, _T, dict[str, Any]],
         items: list[tuple[ContainerKey, _T, dict[str, Any]]],
     ) -> dict[str, Any] | None:
+        from inspect import signature
+
         parameters = signature(item[1]).parameters.items()  # type: ignore
         kwargs: dict[str, Any] = {}
         item[2].update(self._sanitize_item_parameters_before_resolve_or_postpone(parameters, item[2]))
@@ -197,7 +499,8 @@ class Container(Dict[Any, Any]):
                     continue
             if typ not in [i[0] for i in items]:
                 if self.debug:
-                    logger.debug('Postponing {0}'.format(typ))
+                    get_logger().debug('Postponing {0}'.format(typ))
+                event(POSTPONE, fqdn(item[0]), waiting_for=fqdn(typ))
                 items.append((typ, typ, {}))  # type: ignore
                 kwargs = {}
                 break
@@ -230,14 +533,14 @@ class Container(Dict[Any, Any]):
         if isinstance(val, tuple) and len(val) == 2 and callable(val[1]):
             try:
                 if self.debug:
-                    logger.debug('Trying resolve parameter "{0}" from {1}'.format(name, item[1]))
+                    get_logger().debug('Trying resolve parameter "{0}" from {1}'.format(name, item[1]))
                 index = val[0]
                 item[2][name] = val[1](self)
                 self._parameter_resolvers = self._parameter_resolvers[:index] + self._parameter_resolvers[index + 1 :]
                 return item[2][name]
             except (KeyError, ValueError):
                 if self.debug:
-                    logger.debug('Postponing parameter resolver {0}'.format(typ))
+                    get_logger().debug('Postponing parameter resolver {0}'.format(typ))
                 return None
         return val
 
@@ -252,3 +555,83 @@ class Container(Dict[Any, Any]):
                 val = meta_param[1].default
                 params.update({name: val})
         return params
+
+
+# containers prepared to fork, weakly kept (containers are dicts, so not hashable), by a single fork hook
+_preforked: 'WeakValueDictionary[int, Container]' = WeakValueDictionary()
+
+
+def _reinit_after_fork() -> None:
+    # exceptions raised by fork hooks are discarded, failures are logged and their services left unusable
+    for di in list(_preforked.values()):
+        try:
+            di.reinit_after_fork()
+        except Exception as err:  # pylint: disable=W0703
+            get_logger().error('Rebuilding services after fork failed: {0!r}'.format(err))
+
+
+class _UnusableService(ScopedService):
+    """Placeholder of a service whose rebuild failed in a forked child, raising on lookups."""
+
+    __slots__ = ('_key', '_error')
+
+    def __init__(self, key: str, error: Exception, typ: Type[Any] | None = None) -> None:
+        super().__init__(factory=lambda: None, typ=typ)
+        self._key = key
+        self._error = error
+
+    def resolve(self) -> Any:
+        raise RuntimeError('Service <{0}> could not be rebuilt after fork: {1!r}'.format(self._key, self._error))
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
+
+
+class _MeteredContainer(Container):
+    """Lookups of a container with metrics enabled, its class is swapped so disabled ones pay nothing."""
+
+    _unmetered: Type[Container] = Container
+
+    def get(self, key: ContainerKey, typ: Type[_T] | None = None, instance_of: bool = False) -> _T:  # type: ignore
+        if instance_of:
+            return super().get(key, typ=typ, instance_of=True)
+        metrics = cast(ContainerMetrics, self._metrics)
+        name = fqdn(key)
+        if isinstance(key, type) or is_object(key):
+            typ = None
+        start = perf_counter()
+        try:
+            val = self._lookup(key)
+        except KeyError:
+            metrics.miss(name, lookup=perf_counter() - start)
+            raise
+        found = perf_counter()
+        if isinstance(val, ScopedService):
+            count, seconds = constructions.count, constructions.seconds
+            val = val.resolve()
+            # only lookups constructing an instance are observed, not those handing out an existing one
+            construction = constructions.seconds - seconds if constructions.count != count else None
+            metrics.hit(name, lookup=found - start, construction=construction)
+        else:
+            metrics.hit(name, lookup=found - start)
+        return self._check_type(key, val, typ)
+
+    def __contains__(self, *o) -> bool:  # type: ignore
+        metrics = cast(ContainerMetrics, self._metrics)
+        start = perf_counter()
+        found = super().__contains__(*o)
+        if len(o) > 0:
+            (metrics.hit if found else metrics.miss)(fqdn(o[0]), lookup=perf_counter() - start)
+        return found
+
+
+_metered_classes: dict[type, Type[Container]] = {Container: _MeteredContainer}
+
+
+def _metered_class(cls: Type[Container]) -> Type[Container]:
+    if issubclass(cls, _MeteredContainer):
+        return cls
+    if cls not in _metered_classes:
+        _metered_classes[cls] = type('Metered' + cls.__name__, (_MeteredContainer, cls), {'_unmetered': cls})
+    return _metered_classes[cls]
@@ -0,0 +1,178 @@
+from array import array
+from types import MappingProxyType
+from typing import Any, Iterator, Mapping, Type, TypeVar
+
+from .helpers import fqdn, is_object
+from .scope import resolve_scoped
+
+_T = TypeVar('_T')
+
+
+def _flatten(items: Mapping[str, Any], prefix: str = '') -> Iterator[tuple[str, Any]]:
+    for key, val in items.items():
+        if type(val) is dict and len(val) > 0:  # pylint: disable=C0123
+            yield from _flatten(val, prefix + key + '.')
+        else:
+            yield prefix + key, val
+
+
+def _perfect_hash(keys: tuple[str, ...]) -> array:  # type: ignore[type-arg]
+    """
+    Hash and displace: keys are grouped in buckets by hash(key), then the biggest buckets first find a displacement
+    placing all their keys in free slots through hash((displacement, key)). Buckets of one key are placed straight in
+    a remaining free slot, stored as -slot - 1. Slots are verified against keys on lookup.
+    """
+    size = len(keys)
+    displacements = array('i', [0] * size)
+    if size == 0:
+        return displacements
+    buckets: list[list[int]] = [[] for _ in range(size)]
+    for index, key in enumerate(keys):
+        buckets[hash(key) % size].append(index)
+    slots = [-1] * size
+    order = sorted(range(size), key=lambda bucket: len(buckets[bucket]), reverse=True)
+    position = 0
+    for position, bucket in enumerate(order):
+        if len(buckets[bucket]) <= 1:
+            break
+        displacement = 1
+        while True:
+            placed = [hash((displacement, keys[index])) % size for index in buckets[bucket]]
+            if len(set(placed)) == len(placed) and all(slots[slot] == -1 for slot in placed):
+                break
+            displacement += 1
+        displacements[bucket] = displacement
+        for slot, index in zip(placed, buckets[bucket]):
+            slots[slot] = index
+    free = [slot for slot in range(size) if slots[slot] == -1]
+    for bucket in order[position:]:
+        if len(buckets[bucket]) == 1:
+            slot = free.pop()
+            slots[slot] = buckets[bucket][0]
+            displacements[bucket] = -slot - 1
+    return displacements
+
+
+class FrozenContainer:
+    """
+    Read-only and compact representation of a Container: dotted keys are packed in a single string with an offsets
+    array and values in a tuple, both sorted by a minimal perfect hash, so no dict per namespace, no str per key nor
+    build-time metadata is kept alive.
+    """
+
+    __slots__ = ('_blob', '_offsets', '_values', '_displacements')
+
+    _blob: str
+    _offsets: array  # type: ignore[type-arg]
+    _values: tuple[Any, ...]
+    _displacements: array  # type: ignore[type-arg]
+
+    def __init__(self, items: Mapping[str, Any]) -> None:
+        entries = dict(_flatten(items))
+        keys = tuple(entries.keys())
+        displacements = _perfect_hash(keys)
+        slots = [''] * len(keys)
+        for key in keys:
+            slots[self._slot(displacements, key)] = key
+        offsets = array('I', [0])
+        for key in slots:
+            offsets.append(offsets[-1] + len(key))
+        object.__setattr__(self, '_blob', ''.join(slots))
+        object.__setattr__(self, '_offsets', offsets)
+        object.__setattr__(self, '_values', tuple(entries[key] for key in slots))
+        object.__setattr__(self, '_displacements', displacements)
+
+    @staticmethod
+    def _slot(displacements: array, key: str) -> int:  # type: ignore[type-arg]
+        size = len(displacements)
+        displacement = displacements[hash(key) % size]
+        return -displacement - 1 if displacement < 0 else hash((displacement, key)) % size
+
+    def _index(self, key: str) -> int:
+        if len(self._values) == 0:
+            return -1
+        index = self._slot(self._displacements, key)
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return index if end - start == len(key) and self._blob.startswith(key, start, end) else -1
+
+    def _keys(self) -> Iterator[str]:
+        offsets = self._offsets
+        return (self._blob[offsets[index] : offsets[index + 1]] for index in range(len(self._values)))
+
+    def get(self, key: Any, typ: Type[_T] | None = None, instance_of: bool = False) -> _T:
+        """Same lookups as Container.get."""
+        if instance_of:
+            key = key if isinstance(key, type) else type(key) if is_object(key) else None
+            if not key:
+                raise ValueError('key parameter must be a type or object non-primitive to use instance_of parameter')
+            return list({val for val in self._values if isinstance(val, key)})  # type: ignore
+        if isinstance(key, type) or is_object(key):
+            typ = None
+            key = fqdn(key)
+        if not isinstance(key, str):
+            raise KeyError('<{0}> does not exist in container'.format(key))
+        index = self._index(key)
+        if index == -1:
+            val = self._namespace(key)
+        else:
+            val = resolve_scoped(self._values[index])
+        if typ and not isinstance(val, (typ,)):
+            raise TypeError('<{0}: {1}> does not exist in container'.format(key, typ.__name__))
+        return val  # type: ignore
+
+    def _namespace(self, key: str) -> Mapping[str, Any]:
+        prefix = key + '.'
+        items: dict[str, Any] = {}
+        for key_, val in zip(self._keys(), self._values):
+            if key_.startswith(prefix):
+                here = items
+                parts = key_[len(prefix) :].split('.')
+                for part in parts[:-1]:
+                    here = here.setdefault(part, {})
+                here[parts[-1]] = val
+        if not items:
+            raise KeyError('<{0}> does not exist in container'.format(key))
+        return MappingProxyType(items)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self.get(key)
+
+    def __contains__(self, key: Any) -> bool:
+        try:
+            self.get(key)
+            return True
+        except (KeyError, TypeError, ValueError):
+            return False
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __iter__(self) -> Iterator[str]:
+        return self._keys()
+
+    def items(self) -> Iterator[tuple[str, Any]]:
+        return zip(self._keys(), self._values)
+
+    def __setattr__(self, key: str, val: Any) -> None:
+        raise TypeError('Frozen container can not be mutated')
+
+    def __delattr__(self, key: str) -> None:
+        raise TypeError('Frozen container can not be mutated')
+
+    def __setitem__(self, key: Any, val: Any) -> None:
+        raise TypeError('Frozen container can not be mutated')
+
+    def __delitem__(self, key: Any) -> None:
+        raise TypeError('Frozen container can not be mutated')
+
+    def set(self, key: Any, val: Any = ...) -> None:
+        raise TypeError('Frozen container can not be mutated')
+
+    def resolve(self, items: Any) -> None:
+        raise TypeError('Frozen container can not be mutated')
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return self.__class__, (dict(self.items()),)
+
+    def __repr__(self) -> str:
+        return '{0}({1} entries)'.format(self.__class__.__name__, len(self._values))
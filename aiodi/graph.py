@@ -0,0 +1,189 @@
+from typing import Any, Iterable, Mapping
+
+from .resolver.service import ServiceMetadata, collection_keys
+from .tags import TagIndex
+
+
+class ServiceGraph:
+    """Dependency graph between services, keyed by service name."""
+
+    __slots__ = ('_dependencies', '_dependents', '_unresolved')
+
+    def __init__(
+        self, dependencies: Mapping[str, Iterable[str]], unresolved: Mapping[str, Iterable[str]] | None = None
+    ) -> None:
+        self._dependencies: dict[str, tuple[str, ...]] = {
+            key: tuple(dict.fromkeys(deps)) for key, deps in dependencies.items()
+        }
+        self._dependents: dict[str, tuple[str, ...]] = {key: () for key in self._dependencies}
+        for key, deps in self._dependencies.items():
+            for dep in deps:
+                self._dependents[dep] = (*self._dependents.get(dep, ()), key)
+        self._unresolved: dict[str, tuple[str, ...]] = {key: tuple(deps) for key, deps in (unresolved or {}).items()}
+
+    @classmethod
+    def from_services(cls, services: Mapping[str, ServiceMetadata], tags: TagIndex | None = None) -> 'ServiceGraph':
+        """
+        Compute dependencies statically from metadata: "@key" arguments point to the given key, "#tag" arguments and
+        collection parameters to every member, and autowired parameters to the only service whose type is a subclass
+        of the parameter type.
+        Parameters which can not be statically resolved are kept as unresolved type names.
+        """
+        tags = TagIndex.from_services(services) if tags is None else tags
+        dependencies: dict[str, list[str]] = {}
+        unresolved: dict[str, list[str]] = {}
+        for key, metadata in services.items():
+            dependencies[key] = []
+            for param in metadata.params:
+                if param.source_kind == 'svc':
+                    dependencies[key].append(param.default[1:])
+                elif param.source_kind == 'tag' or (param.source_kind == 'col' and metadata.defaults.autowire):
+                    dependencies[key] += [dep for dep in collection_keys(tags=tags, param=param) if dep != key]
+                elif param.source_kind == 'typ' and metadata.defaults.autowire:
+                    candidates = cls.providers_of(services=services, typ=param.type)
+                    if len(candidates) == 1:
+                        dependencies[key].append(candidates[0])
+                    else:
+                        unresolved.setdefault(key, []).append(getattr(param.type, '__name__', str(param.type)))
+        return cls(dependencies=dependencies, unresolved=unresolved)
+
+    @staticmethod
+    def providers_of(services: Mapping[str, ServiceMetadata], typ: Any) -> list[str]:
+        if not isinstance(typ, type):
+            return []
+        return [
+            key
+            for key, metadata in services.items()
+            if isinstance(metadata.type, type) and issubclass(metadata.type, typ)
+        ]
+
+    def keys(self) -> list[str]:
+        return list(self._dependencies.keys())
+
+    def dependencies(self, key: str) -> tuple[str, ...]:
+        return self._dependencies.get(key, ())
+
+    def dependents(self, key: str) -> tuple[str, ...]:
+        return self._dependents.get(key, ())
+
+    def unresolved(self) -> dict[str, tuple[str, ...]]:
+        return dict(self._unresolved)
+
+    def is_complete(self) -> bool:
+        """Whether every dependency is statically known and declared."""
+        return len(self._unresolved) == 0 and all(
+            dep in self._dependencies for deps in self._dependencies.values() for dep in deps
+        )
+
+    def transitive_dependents(self, keys: Iterable[str]) -> set[str]:
+        """Given keys plus everything depending on them, directly or not."""
+        found: set[str] = set()
+        pending = list(keys)
+        while pending:
+            key = pending.pop()
+            if key in found:
+                continue
+            found.add(key)
+            pending += self.dependents(key)
+        return found
+
+    def transitive_dependencies(self, key: str) -> set[str]:
+        """Everything the given key depends on, directly or not, excluding itself."""
+        found: set[str] = set()
+        pending = list(self.dependencies(key))
+        while pending:
+            dep = pending.pop()
+            if dep in found:
+                continue
+            found.add(dep)
+            pending += self.dependencies(dep)
+        return found
+
+    def levels(self) -> list[list[str]]:
+        """
+        Topological levels: every service only depends on services of previous levels.
+        Keys keep their declaration order inside each level.
+
+        :raises: ValueError on cycles
+        """
+        remaining = {
+            key: [dep for dep in deps if dep in self._dependencies] for key, deps in self._dependencies.items()
+        }
+        done: set[str] = set()
+        levels: list[list[str]] = []
+        while remaining:
+            level = [key for key, deps in remaining.items() if all(dep in done for dep in deps)]
+            if not level:
+                raise ValueError('Circular dependency between <{0}>'.format(', '.join(remaining.keys())))
+            for key in level:
+                del remaining[key]
+            done.update(level)
+            levels.append(level)
+        return levels
+
+    def order(self, keys: Iterable[str] | None = None) -> list[str]:
+        """Keys (all by default) sorted so dependencies come first, only walking what the given keys depend on."""
+        if keys is None:
+            return [key for level in self.levels() for key in level]
+        selected = dict.fromkeys(keys)
+        ordered: list[str] = []
+        visited: set[str] = set()
+        for root in selected:
+            if root in visited:
+                continue
+            visited.add(root)
+            stack = [(root, iter(self.dependencies(root)))]
+            while stack:
+                key, deps = stack[-1]
+                for dep in deps:
+                    if dep not in visited:
+                        visited.add(dep)
+                        stack.append((dep, iter(self.dependencies(dep))))
+                        break
+                else:
+                    stack.pop()
+                    if key in selected:
+                        ordered.append(key)
+        return ordered
+
+    def unreferenced(self) -> list[str]:
+        """Services no other service depends on."""
+        return [key for key in self._dependencies if len(self.dependents(key)) == 0]
+
+    def critical_path(self, durations: Mapping[str, float]) -> tuple[list[str], float]:
+        """The most expensive chain of dependencies, given the construction time of each service."""
+        costs: dict[str, tuple[float, str | None]] = {}
+        for key in self.order():
+            previous = max(
+                ((costs[dep][0], dep) for dep in self.dependencies(key) if dep in costs),
+                default=(0.0, None),
+            )
+            costs[key] = (previous[0] + durations.get(key, 0.0), previous[1])
+        if not costs:
+            return [], 0.0
+        last = max(costs, key=lambda name: costs[name][0])
+        total = costs[last][0]
+        path: list[str] = []
+        current: str | None = last
+        while current is not None:
+            path.insert(0, current)
+            current = costs[current][1]
+        return path, total
+
+    def to_text(self) -> str:
+        lines: list[str] = []
+        for key, deps in self._dependencies.items():
+            lines.append(key)
+            lines += ['  -> {0}'.format(dep) for dep in deps]
+            lines += ['  -> ? {0}'.format(dep) for dep in self._unresolved.get(key, ())]
+        return '\n'.join(lines)
+
+    def to_dot(self) -> str:
+        lines = ['digraph aiodi {']
+        lines += ['  "{0}";'.format(key) for key in self._dependencies]
+        lines += ['  "{0}" -> "{1}";'.format(key, dep) for key, deps in self._dependencies.items() for dep in deps]
+        lines.append('}')
+        return '\n'.join(lines)
+
+    def to_dict(self) -> dict[str, list[str]]:
+        return {key: list(deps) for key, deps in self._dependencies.items()}
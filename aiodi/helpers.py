@@ -2,10 +2,11 @@ import typing
 from abc import ABC
 from importlib import import_module
 from pathlib import Path
-from pkgutil import walk_packages
 from re import finditer
 from types import ModuleType
 
+from .instrument import IMPORT, span
+
 typing_get_args = getattr(
     typing, 'get_args', lambda t: getattr(t, '__args__', ()) if t is not typing.Generic else typing.Generic
 )
@@ -30,11 +31,24 @@ def is_optional(field: typing.Any) -> bool:  # pragma: no cover
     return typing_get_origin(field) is typing.Union and type(None) in typing_get_args(field)  # type: ignore
 
 
+def fqdn(val: typing.Any) -> str:
+    if isinstance(val, str):
+        return val
+    if isinstance(val, type):
+        return '{0}.{1}'.format(val.__module__, val.__name__)
+    return '{0}.{1}'.format(val.__class__.__module__, val.__class__.__name__)
+
+
+def import_module_traced(name: str) -> ModuleType:
+    with span(IMPORT, name):
+        return import_module(name=name)
+
+
 def import_module_and_get_attr(name: str) -> typing.Type[typing.Any]:
     name = name.replace('/', '.')
     mod = '.'.join(name.split('.')[:-1])
     svc = name.split('.')[-1]
-    globals()[mod] = import_module(name=mod)
+    globals()[mod] = import_module_traced(name=mod)
     return getattr(globals()[mod], svc)  # type: ignore
 
 
@@ -45,13 +59,15 @@ def types_in_module(module: ModuleType) -> typing.List[typing.Type[typing.Any]]:
 
 def import_submodules(path: str, recursive: bool, excludes: typing.List[Path]) -> typing.Dict[str, ModuleType]:
     full_name = path.replace('.py', '', 1).replace('/', '.')
-    package = import_module(name=full_name)
+    package = import_module_traced(name=full_name)
 
     exclude_paths = [str(exclude) for exclude in excludes]
     includes: typing.List[typing.Tuple[Path, str, bool]] = []
     results: typing.Dict[str, ModuleType] = {}
 
     if hasattr(package, '__path__'):
+        from pkgutil import walk_packages
+
         for file_finder, name, is_pkg in walk_packages(path=package.__path__):
             include = Path(file_finder.path)  # type: ignore
             include_absolute_path = str(Path(file_finder.path)) + '/' + name + ('' if is_pkg else '.py')  # type: ignore
@@ -63,7 +79,7 @@ def import_submodules(path: str, recursive: bool, excludes: typing.List[Path]) -
 
     for include, name, is_pkg in includes:
         full_name = package.__name__ + '.' + name
-        results[full_name] = import_module(name=full_name)
+        results[full_name] = import_module_traced(name=full_name)
         if recursive and is_pkg:
             results.update(import_submodules(path=full_name.replace('.', '/'), recursive=recursive, excludes=excludes))
     return results
@@ -96,3 +112,15 @@ def re_finditer(pattern: typing.Any, string: typing.Any) -> typing.List[typing.A
 
 def is_abstract(val: typing.Any) -> bool:
     return hasattr(val, '__mro__') and val.__mro__[1:][0] is ABC
+
+
+def deep_merge(*items: typing.Mapping[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+    """Merge dicts recursively from left to right, right values win unless both sides are dicts."""
+    result: typing.Dict[str, typing.Any] = {}
+    for item in items:
+        for key, val in item.items():
+            if isinstance(val, dict) and isinstance(result.get(key), dict):
+                result[key] = deep_merge(result[key], val)
+            else:
+                result[key] = val
+    return result
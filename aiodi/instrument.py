@@ -0,0 +1,279 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from os import getpid
+from pathlib import Path
+from threading import get_ident
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Iterator, NamedTuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from tracemalloc import Snapshot
+
+    from .graph import ServiceGraph
+
+PHASE = 'phase'
+IMPORT = 'import'
+SERVICE = 'service'
+POSTPONE = 'postpone'
+RETRY = 'retry'
+
+
+class Instrument:
+    """
+    Hook surface notified while building containers. Every method is a no-op, override the ones you need.
+
+    Kinds of spans: "phase" (path, loader, variable, service), "import" (module name) and "service" (service key).
+    Kinds of instant events: "postpone" (key waiting for a dependency) and "retry" (key resolved again).
+    """
+
+    def on_start(self, kind: str, name: str, args: dict[str, Any]) -> None:
+        pass
+
+    def on_end(self, kind: str, name: str, args: dict[str, Any]) -> None:
+        pass
+
+    def on_event(self, kind: str, name: str, args: dict[str, Any]) -> None:
+        pass
+
+
+_instrument: ContextVar[Instrument | None] = ContextVar('aiodi_instrument', default=None)
+
+
+def current_instrument() -> Instrument | None:
+    return _instrument.get()
+
+
+@contextmanager
+def instrumented(instrument: Instrument | None) -> Iterator[Instrument | None]:
+    """
+    e.g.
+    recorder = TraceRecorder()
+    with instrumented(recorder):
+        container.resolve([...])
+    recorder.write('trace.json')
+    """
+    token = _instrument.set(instrument)
+    try:
+        yield instrument
+    finally:
+        _instrument.reset(token)
+
+
+@contextmanager
+def span(kind: str, name: str, **args: Any) -> Iterator[None]:
+    instrument = _instrument.get()
+    if instrument is None:
+        yield
+        return
+    instrument.on_start(kind, name, args)
+    try:
+        yield
+    finally:
+        instrument.on_end(kind, name, args)
+
+
+def event(kind: str, name: str, **args: Any) -> None:
+    instrument = _instrument.get()
+    if instrument is not None:
+        instrument.on_event(kind, name, args)
+
+
+class TraceSpan(NamedTuple):
+    kind: str
+    name: str
+    start: float
+    duration: float
+    thread: int
+    args: dict[str, Any]
+
+
+class TraceRecorder(Instrument):
+    """Records spans and events, exportable as Chrome trace-event JSON (chrome://tracing, Perfetto)."""
+
+    def __init__(self) -> None:
+        self._origin = perf_counter()
+        self._spans: list[TraceSpan] = []
+        self._events: list[TraceSpan] = []
+        self._stacks: dict[int, list[float]] = {}
+
+    def on_start(self, kind: str, name: str, args: dict[str, Any]) -> None:
+        self._stacks.setdefault(get_ident(), []).append(perf_counter())
+
+    def on_end(self, kind: str, name: str, args: dict[str, Any]) -> None:
+        end = perf_counter()
+        thread = get_ident()
+        start = self._stacks[thread].pop()
+        self._spans.append(
+            TraceSpan(kind=kind, name=name, start=start - self._origin, duration=end - start, thread=thread, args=args)
+        )
+
+    def on_event(self, kind: str, name: str, args: dict[str, Any]) -> None:
+        self._events.append(
+            TraceSpan(
+                kind=kind, name=name, start=perf_counter() - self._origin, duration=0.0, thread=get_ident(), args=args
+            )
+        )
+
+    def spans(self, kind: str | None = None) -> list[TraceSpan]:
+        return [item for item in self._spans if kind is None or item.kind == kind]
+
+    def events(self, kind: str | None = None) -> list[TraceSpan]:
+        return [item for item in self._events if kind is None or item.kind == kind]
+
+    def durations(self, kind: str = SERVICE) -> dict[str, float]:
+        """Total seconds spent per name for a kind of span."""
+        durations: dict[str, float] = {}
+        for item in self.spans(kind):
+            durations[item.name] = durations.get(item.name, 0.0) + item.duration
+        return durations
+
+    def summary(self, top: int = 10, kind: str = SERVICE) -> list[tuple[str, float]]:
+        """The top slowest names for a kind of span, in seconds."""
+        return sorted(self.durations(kind).items(), key=lambda item: item[1], reverse=True)[:top]
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        pid = getpid()
+        events: list[dict[str, Any]] = [
+            {
+                'name': item.name,
+                'cat': item.kind,
+                'ph': 'X',
+                'ts': item.start * 1e6,
+                'dur': item.duration * 1e6,
+                'pid': pid,
+                'tid': item.thread,
+                'args': {key: str(val) for key, val in item.args.items()},
+            }
+            for item in self._spans
+        ]
+        events += [
+            {
+                'name': item.name,
+                'cat': item.kind,
+                'ph': 'i',
+                's': 't',
+                'ts': item.start * 1e6,
+                'pid': pid,
+                'tid': item.thread,
+                'args': {key: str(val) for key, val in item.args.items()},
+            }
+            for item in self._events
+        ]
+        return {'traceEvents': sorted(events, key=lambda item: item['ts']), 'displayTimeUnit': 'ms'}
+
+    def write(self, path: str | Path) -> None:
+        from json import dump
+
+        with open(path, 'w', encoding='utf-8') as file:
+            dump(self.to_chrome_trace(), file)
+
+
+class MemoryRecord(NamedTuple):
+    kind: str
+    name: str
+    size: int  # bytes retained once the span ends
+    blocks: int  # memory blocks retained once the span ends
+    self_size: int  # excluding nested spans
+    self_blocks: int
+
+
+class MemoryRecorder(Instrument):
+    """
+    Memory retained per module import and per service construction, from tracemalloc snapshots taken around each
+    span. Tracing is started on the first span if needed, call stop() afterwards. Concurrent spans, e.g. when loading
+    with an executor, are not told apart.
+
+    e.g.
+    recorder = MemoryRecorder()
+    container = ContainerBuilder(instrument=recorder).load()
+    recorder.stop()
+    recorder.report(graph=container.plan.graph)[:10]
+    """
+
+    def __init__(self, kinds: tuple[str, ...] = (IMPORT, SERVICE), frames: int = 1) -> None:
+        self._kinds = kinds
+        self._frames = frames
+        self._tracing = False
+        self._stacks: dict[int, list[list[Any]]] = {}
+        self._records: list[MemoryRecord] = []
+
+    @staticmethod
+    def _snapshot() -> 'Snapshot':
+        from tracemalloc import Filter, take_snapshot
+
+        return take_snapshot().filter_traces(
+            (Filter(False, '*/tracemalloc.py'), Filter(False, '<frozen importlib._bootstrap>'))
+        )
+
+    def on_start(self, kind: str, name: str, args: dict[str, Any]) -> None:
+        if kind not in self._kinds:
+            return
+        from tracemalloc import is_tracing, start
+
+        if not is_tracing():
+            start(self._frames)
+            self._tracing = True
+        self._stacks.setdefault(get_ident(), []).append([self._snapshot(), 0, 0])
+
+    def on_end(self, kind: str, name: str, args: dict[str, Any]) -> None:
+        if kind not in self._kinds:
+            return
+        stack = self._stacks[get_ident()]
+        before, nested_size, nested_count = stack.pop()
+        stats = self._snapshot().compare_to(before, 'filename')
+        size = sum(stat.size_diff for stat in stats)
+        count = sum(stat.count_diff for stat in stats)
+        self._records.append(
+            MemoryRecord(
+                kind=kind,
+                name=name,
+                size=size,
+                blocks=count,
+                self_size=size - nested_size,
+                self_blocks=count - nested_count,
+            )
+        )
+        if stack:
+            stack[-1][1] += size
+            stack[-1][2] += count
+
+    def stop(self) -> None:
+        """Stop tracing, if it was started by this recorder."""
+        from tracemalloc import stop
+
+        if self._tracing:
+            stop()
+            self._tracing = False
+
+    def records(self, kind: str | None = None) -> list[MemoryRecord]:
+        return [item for item in self._records if kind is None or item.kind == kind]
+
+    def retained(self, kind: str = SERVICE) -> dict[str, tuple[int, int]]:
+        """Bytes and blocks retained per name, excluding nested spans."""
+        retained: dict[str, tuple[int, int]] = {}
+        for item in self.records(kind):
+            size, count = retained.get(item.name, (0, 0))
+            retained[item.name] = (size + item.self_size, count + item.self_blocks)
+        return retained
+
+    def report(self, graph: 'ServiceGraph | None' = None, kind: str = SERVICE) -> list[dict[str, Any]]:
+        """
+        Retained memory per name, sorted by bytes. Given the service graph, also what each service pulls in
+        transitively through its dependencies.
+        """
+        retained = self.retained(kind)
+        rows: list[dict[str, Any]] = []
+        for name, (size, count) in retained.items():
+            row: dict[str, Any] = {'name': name, 'size': size, 'blocks': count}
+            if graph is not None:
+                deps = graph.transitive_dependencies(name)
+                row['subtree_size'] = size + sum(retained.get(dep, (0, 0))[0] for dep in deps)
+                row['subtree_blocks'] = count + sum(retained.get(dep, (0, 0))[1] for dep in deps)
+            rows.append(row)
+        return sorted(rows, key=lambda row: (row.get('subtree_size', row['size']), row['size']), reverse=True)
+
+    def write(self, path: str | Path, graph: 'ServiceGraph | None' = None) -> None:
+        from json import dump
+
+        with open(path, 'w', encoding='utf-8') as file:
+            dump({kind: self.report(graph=graph, kind=kind) for kind in self._kinds}, file, indent=2)
@@ -1,3 +1,19 @@
-from logging import getLogger
+from typing import TYPE_CHECKING, Any
 
-logger = getLogger('aiodi')
+if TYPE_CHECKING:  # pragma: no cover
+    from logging import Logger
+
+    logger: Logger
+
+
+def get_logger() -> 'Logger':
+    """The aiodi logger, logging is only imported once something is logged."""
+    from logging import getLogger
+
+    return getLogger('aiodi')
+
+
+def __getattr__(name: str) -> Any:
+    if name != 'logger':
+        raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+    return get_logger()
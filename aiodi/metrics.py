@@ -0,0 +1,154 @@
+from bisect import bisect_left
+from threading import Lock
+from typing import Any, Iterable
+
+BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0, float('inf'))
+
+
+class Histogram:
+    """Latencies in seconds, counted per upper bound as in Prometheus (buckets are cumulative when exported)."""
+
+    __slots__ = ('counts', 'sum')
+
+    def __init__(self) -> None:
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        total = 0
+        buckets: list[tuple[float, int]] = []
+        for bound, count in zip(BUCKETS, self.counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': {_format_bound(bound): count for bound, count in self.cumulative()},
+        }
+
+
+class KeyMetrics:
+    __slots__ = ('hits', 'misses', 'lookup', 'construction')
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.lookup = Histogram()
+        self.construction = Histogram()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'lookup': self.lookup.to_dict(),
+            'construction': self.construction.to_dict(),
+        }
+
+
+class ContainerMetrics:
+    """
+    Lookups per key of a container: hits, misses, lookup latency and construction latency of scoped services (of
+    lookups constructing an instance).
+
+    e.g.
+    metrics = container.enable_metrics()  # or ContainerMetrics(services=[...]) to report unrequested ones
+    metrics.snapshot()  # {'keys': {...}, 'unrequested': [...]}
+    metrics.to_prometheus()
+    """
+
+    def __init__(self, services: Iterable[str] | None = None) -> None:
+        self._services = tuple(services or ())
+        self._keys: dict[str, KeyMetrics] = {}
+        self._lock = Lock()
+
+    def _key(self, key: str) -> KeyMetrics:
+        metrics = self._keys.get(key)
+        if metrics is None:
+            metrics = self._keys.setdefault(key, KeyMetrics())
+        return metrics
+
+    def hit(self, key: str, lookup: float, construction: float | None = None) -> None:
+        with self._lock:
+            metrics = self._key(key)
+            metrics.hits += 1
+            metrics.lookup.observe(lookup)
+            if construction is not None:
+                metrics.construction.observe(construction)
+
+    def miss(self, key: str, lookup: float) -> None:
+        with self._lock:
+            metrics = self._key(key)
+            metrics.misses += 1
+            metrics.lookup.observe(lookup)
+
+    def unrequested(self) -> list[str]:
+        """Services never found by a lookup."""
+        return [key for key in self._services if key not in self._keys or self._keys[key].hits == 0]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._keys = {}
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            keys = {key: metrics.to_dict() for key, metrics in self._keys.items()}
+        return {'keys': keys, 'unrequested': self.unrequested()}
+
+    def to_prometheus(self, prefix: str = 'aiodi') -> str:
+        """Text exposition format, e.g. to be served on /metrics."""
+        with self._lock:
+            items = sorted(self._keys.items())
+            lines = [
+                '# HELP {0}_lookups_total Container lookups per key and result.'.format(prefix),
+                '# TYPE {0}_lookups_total counter'.format(prefix),
+            ]
+            for key, metrics in items:
+                lines.append(
+                    '{0}_lookups_total{{key="{1}",result="hit"}} {2}'.format(prefix, _label(key), metrics.hits)
+                )
+                lines.append(
+                    '{0}_lookups_total{{key="{1}",result="miss"}} {2}'.format(prefix, _label(key), metrics.misses)
+                )
+            for name, help_ in (
+                ('lookup', 'Container lookup latency per key.'),
+                ('construction', 'Construction latency of scoped services per key.'),
+            ):
+                metric = '{0}_{1}_seconds'.format(prefix, name)
+                lines += ['# HELP {0} {1}'.format(metric, help_), '# TYPE {0} histogram'.format(metric)]
+                for key, metrics in items:
+                    histogram: Histogram = getattr(metrics, name)
+                    if histogram.count == 0:
+                        continue
+                    for bound, count in histogram.cumulative():
+                        lines.append(
+                            '{0}_bucket{{key="{1}",le="{2}"}} {3}'.format(
+                                metric, _label(key), _format_bound(bound), count
+                            )
+                        )
+                    lines.append('{0}_sum{{key="{1}"}} {2}'.format(metric, _label(key), repr(histogram.sum)))
+                    lines.append('{0}_count{{key="{1}"}} {2}'.format(metric, _label(key), histogram.count))
+        lines += [
+            '# HELP {0}_unrequested_services Services never found by a lookup.'.format(prefix),
+            '# TYPE {0}_unrequested_services gauge'.format(prefix),
+            '{0}_unrequested_services {1}'.format(prefix, len(self.unrequested())),
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+def _format_bound(bound: float) -> str:
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+def _label(val: str) -> str:
+    return val.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,152 @@
+from typing import Any, Iterable, NamedTuple
+
+from .graph import ServiceGraph
+from .helpers import fqdn, re_finditer
+from .resolver import Resolver
+from .resolver.service import ServiceMetadata, ServiceResolver
+from .resolver.variable import REGEX, VariableResolver
+from .scope import LOOP, TASK, ServiceLRU
+from .tags import TagIndex
+
+_resolvers: dict[str, Resolver[Any, Any]] = {'service': ServiceResolver(), 'variable': VariableResolver()}
+_NO_TAGS = TagIndex(tags={}, types={})
+
+
+def _referenced_variables(val: Any) -> list[str]:
+    """Names of the variables a value references with %var(name)%."""
+    return [str(match.groups()[2]) for match in re_finditer(pattern=REGEX, string=val) if match.groups()[0] == 'var']
+
+
+# scopes of the services that may be given services of a scope, others would keep the instance of a single task or loop
+_DEPENDENT_SCOPES = {TASK: (TASK,), LOOP: (TASK, LOOP)}
+
+
+def _check_scopes(services: dict[str, ServiceMetadata]) -> None:
+    """
+    Only task scoped services may be given task scoped ones, and only task or loop scoped services loop scoped ones,
+    others would keep the instance of a single task or loop (tagged collections resolve scoped members on each
+    access, so they may hold them).
+    """
+    for key, metadata in services.items():
+        for param in metadata.params:
+            if param.source_kind == 'svc':
+                deps = [param.default[1:]]
+            elif param.source_kind == 'typ' and metadata.defaults.autowire:
+                deps = ServiceGraph.providers_of(services=services, typ=param.type)
+                deps = deps if len(deps) == 1 else []
+            else:
+                continue
+            for dep in deps:
+                scope = services[dep].scope if dep in services else None
+                if scope in _DEPENDENT_SCOPES and metadata.scope not in _DEPENDENT_SCOPES[scope]:
+                    raise ValueError(
+                        'Service <{0}> ({1} scope) can not depend on the {2} scoped service <{3}>'.format(
+                            key, metadata.scope, scope, dep
+                        )
+                    )
+
+
+class BuildPlan(NamedTuple):
+    """What a ContainerBuilder resolved to build a Container: variable values, service metadata and their graph."""
+
+    variables: dict[str, Any]
+    services: dict[str, ServiceMetadata]
+    graph: ServiceGraph
+    variables_key: str = 'env'
+    variable_dependents: dict[str, tuple[str, ...]] = {}
+    tags: TagIndex = _NO_TAGS
+    order: tuple[str, ...] = ()  # services in the order they were constructed
+    variable_sources: dict[str, Any] = {}  # declared values of variables, e.g. "postgres://%var(host)%/db"
+    cached_services: ServiceLRU | None = None  # LRU of the instances of its cached scoped services
+
+    @classmethod
+    def from_services(
+        cls,
+        variables: dict[str, Any],
+        services: dict[str, ServiceMetadata],
+        variables_key: str = 'env',
+        variable_sources: dict[str, Any] | None = None,
+    ) -> 'BuildPlan':
+        variable_dependents: dict[str, list[str]] = {}
+        for key, metadata in services.items():
+            for val in metadata.arguments.values():
+                for name in _referenced_variables(val):
+                    variable_dependents.setdefault(name, []).append(key)
+        tags = TagIndex.from_services(services)
+        graph = ServiceGraph.from_services(services=services, tags=tags)
+        _check_scopes(services=services)
+        return cls(
+            variables=variables,
+            services=services,
+            graph=graph,
+            variables_key=variables_key,
+            variable_dependents={name: tuple(dict.fromkeys(keys)) for name, keys in variable_dependents.items()},
+            tags=tags,
+            variable_sources=dict(variable_sources or {}),
+            cached_services=ServiceLRU(),
+        )
+
+    def services_using(self, variables: Iterable[str]) -> set[str]:
+        """Services whose arguments reference any of the given variables."""
+        return {key for name in variables for key in self.variable_dependents.get(name, ())}
+
+    def service_key(self, key: Any) -> str:
+        """The key of the service a key names: itself, or for a type, the only service providing it."""
+        name = fqdn(key)
+        if name in self.services:
+            return name
+        providers = self.tags.providers(key) if isinstance(key, type) else ()
+        if len(providers) == 1:
+            return providers[0]
+        if len(providers) > 1:
+            raise ValueError(
+                '<{0}> is provided by several services ({1}), use one of their keys'.format(name, ', '.join(providers))
+            )
+        raise KeyError('<{0}> is not a service of the container'.format(name))
+
+    def resolve_variables(self, overrides: dict[str, Any]) -> dict[str, Any]:
+        """
+        The given variable overrides plus the variables referencing them, directly or not, resolved again with them.
+        e.g.
+        plan.resolve_variables({'host': 'tenant'})  # {'host': 'tenant', 'url': 'postgres://tenant/db'}
+        """
+        references = {name: set(_referenced_variables(val)) for name, val in self.variable_sources.items()}
+        stale: set[str] = set()
+        pending = list(overrides)
+        while pending:
+            name = pending.pop()
+            for user, names in references.items():
+                if name in names and user not in overrides and user not in stale:
+                    stale.add(user)
+                    pending.append(user)
+        variables = {**self.variables, **overrides}
+        changed = dict(overrides)
+        resolver = _resolvers['variable']
+        while stale:
+            ready = [name for name in stale if not references[name] & stale]
+            if len(ready) == 0:
+                raise ValueError('Variables <{0}> reference each other'.format(', '.join(sorted(stale))))
+            for name in ready:
+                variables[name] = changed[name] = resolver.parse_value(
+                    metadata=resolver.extract_metadata(
+                        data={'key': name, 'val': self.variable_sources[name]}, extra={}
+                    ),
+                    retries=-1,
+                    extra={'variables': variables},
+                )
+                stale.discard(name)
+        return changed
+
+    def construct(self, key: str, services: dict[str, Any]) -> Any:
+        """Construct a new instance of the service key, its dependencies are taken from services."""
+        return _resolvers['service'].parse_value(
+            metadata=self.services[key],
+            retries=-1,
+            extra={
+                'variables': self.variables,
+                'services': services,
+                'resolvers': _resolvers,
+                'tags': self.tags,
+                'cached_services': self.cached_services,
+            },
+        )
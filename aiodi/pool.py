@@ -0,0 +1,180 @@
+from collections import deque
+from threading import Condition
+from time import monotonic
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Callable, Type
+
+if TYPE_CHECKING:  # pragma: no cover
+    from asyncio import AbstractEventLoop, Future
+
+_BUILD = object()
+_WAIT = object()
+
+
+def _wake_waiter(waiter: 'Future[None]') -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class InstancePool:
+    """
+    Bounded pool of instances lazily built by a factory. Instances idle for longer than max_idle seconds are dropped
+    (and closed, when they have a synchronous close()) on the next acquisition.
+    """
+
+    __slots__ = ('_factory', '_size', '_max_idle', '_idle', '_created', '_cond', '_waiters')
+
+    def __init__(self, factory: Callable[[], Any], size: int, max_idle: float | None = None) -> None:
+        if size < 1:
+            raise ValueError('Pool size must be greater than 0')
+        self._factory = factory
+        self._size = size
+        self._max_idle = max_idle
+        self._idle: deque[tuple[Any, float]] = deque()
+        self._created = 0
+        self._cond = Condition()
+        self._waiters: 'deque[tuple[AbstractEventLoop, Future[None]]]' = deque()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def stats(self) -> dict[str, int]:
+        with self._cond:
+            return {
+                'size': self._size,
+                'created': self._created,
+                'idle': len(self._idle),
+                'in_use': self._created - len(self._idle),
+            }
+
+    def lease(self) -> 'PoolLease':
+        return PoolLease(self)
+
+    def acquire(self, timeout: float | None = None) -> Any:
+        """Take an idle instance or build one, blocking while the pool is exhausted."""
+        with self._cond:
+            found = self._take()
+            while found is _WAIT:
+                if not self._cond.wait(timeout):
+                    raise TimeoutError('No instance released after {0} seconds'.format(timeout))
+                found = self._take()
+        return self._build() if found is _BUILD else found
+
+    async def aacquire(self) -> Any:
+        """Same as acquire, waiting for a released instance without blocking the event loop."""
+        from asyncio import CancelledError, get_running_loop
+
+        while True:
+            with self._cond:
+                found = self._take()
+                if found is _WAIT:
+                    loop = get_running_loop()
+                    waiter: 'Future[None]' = loop.create_future()
+                    self._waiters.append((loop, waiter))
+            if found is not _WAIT:
+                return self._build() if found is _BUILD else found
+            try:
+                await waiter
+            except CancelledError:
+                with self._cond:
+                    if (loop, waiter) in self._waiters:
+                        self._waiters.remove((loop, waiter))
+                    else:
+                        self._wake()  # woken up already, pass it on
+                raise
+
+    def release(self, instance: Any) -> None:
+        with self._cond:
+            self._idle.append((instance, monotonic()))
+            self._wake()
+
+    def _take(self) -> Any:
+        for instance in self._evict():
+            _close(instance)
+        if self._idle:
+            return self._idle.pop()[0]  # most recently released first, so the rest can expire
+        if self._created < self._size:
+            self._created += 1
+            return _BUILD
+        return _WAIT
+
+    def _evict(self) -> list[Any]:
+        if self._max_idle is None:
+            return []
+        evicted: list[Any] = []
+        deadline = monotonic() - self._max_idle
+        while self._idle and self._idle[0][1] < deadline:
+            evicted.append(self._idle.popleft()[0])
+            self._created -= 1
+        return evicted
+
+    def _build(self) -> Any:
+        try:
+            return self._factory()
+        except BaseException:
+            with self._cond:
+                self._created -= 1
+                self._wake()
+            raise
+
+    def _wake(self) -> None:
+        self._cond.notify()
+        while self._waiters:
+            loop, waiter = self._waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_wake_waiter, waiter)
+                return
+            except RuntimeError:  # loop closed
+                continue
+
+
+class PoolLease:
+    """
+    Context manager acquiring an instance from a pool on enter and releasing it on exit, with either "with" or
+    "async with".
+
+    e.g.
+    async with container.get('parser') as parser:
+        parser.feed(data)
+    """
+
+    __slots__ = ('_pool', '_instance')
+
+    def __init__(self, pool: InstancePool) -> None:
+        self._pool = pool
+        self._instance: Any = _WAIT
+
+    def _check(self) -> None:
+        if self._instance is not _WAIT:
+            raise RuntimeError('Pool lease already acquired, get a new one per use')
+
+    def _release(self) -> None:
+        instance, self._instance = self._instance, _WAIT
+        self._pool.release(instance)
+
+    def __enter__(self) -> Any:
+        self._check()
+        self._instance = self._pool.acquire()
+        return self._instance
+
+    def __exit__(self, typ: Type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None) -> None:
+        self._release()
+
+    async def __aenter__(self) -> Any:
+        self._check()
+        self._instance = await self._pool.aacquire()
+        return self._instance
+
+    async def __aexit__(
+        self, typ: Type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None
+    ) -> None:
+        self._release()
+
+
+def _close(instance: Any) -> None:
+    from inspect import iscoroutinefunction
+
+    close = getattr(instance, 'close', None)
+    if callable(close) and not iscoroutinefunction(close):
+        close()
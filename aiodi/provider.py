@@ -0,0 +1,54 @@
+from typing import TYPE_CHECKING, Any, Generic, Type, TypeVar
+
+from .scope import ScopedService
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .container import Container, ContainerKey
+
+_T = TypeVar('_T')
+
+
+class Provider(Generic[_T]):
+    """
+    A callable bound to the value kept for a key, so calling it skips the lookup of Container.get. The value is looked
+    up again once the container changes through set (e.g. services rebuilt after fork), scoped services are resolved
+    on each call.
+
+    e.g.
+    finder = container.provider(UserFinderService)
+    finder()  # same as container.get(UserFinderService)
+    """
+
+    __slots__ = ('_container', '_key', '_typ', '_version', '_value', '_scoped')
+
+    def __init__(self, container: 'Container', key: 'ContainerKey', typ: Type[_T] | None = None) -> None:
+        self._container = container
+        self._key = key
+        self._typ = typ
+        self._version = -1
+        self._value: Any = None
+        self._scoped = False
+        self._bind()
+
+    @property
+    def key(self) -> 'ContainerKey':
+        return self._key
+
+    def _bind(self) -> None:
+        version = self._container._version
+        value = self._container._lookup(self._key)
+        self._scoped = isinstance(value, ScopedService)
+        if not self._scoped:
+            value = self._container._check_type(self._key, value, self._typ)
+        self._value = value
+        self._version = version
+
+    def __call__(self) -> _T:
+        if self._version != self._container._version:
+            self._bind()
+        if self._scoped:
+            return self._container._check_type(self._key, self._value.resolve(), self._typ)
+        return self._value  # type: ignore
+
+    def __repr__(self) -> str:
+        return 'Provider({0!r})'.format(self._key)
@@ -0,0 +1,44 @@
+"""
+Pytest fixtures building the container once per session and handing a copy-on-write fork of it to every test.
+
+e.g.
+# conftest.py
+pytest_plugins = ['aiodi.pytest_plugin']
+
+# pyproject.toml
+[tool.pytest.ini_options]
+aiodi_filenames = ["pyproject.toml"]
+
+# test_users.py
+def test_register(aiodi_container: Container) -> None:
+    di = aiodi_container.override({UserRepository: InMemoryUserRepository()})
+"""
+
+from typing import Iterator
+
+from pytest import Config, Parser, fixture
+
+from .builder import ContainerBuilder
+from .container import Container
+
+
+def pytest_addoption(parser: Parser) -> None:
+    parser.addini('aiodi_filenames', 'aiodi configuration files of the session container', type='linelist', default=[])
+    parser.addini('aiodi_cwd', 'directory of aiodi configuration files, relative to rootdir', default='')
+    parser.addini('aiodi_environment', 'aiodi environment overlay to load', default='')
+
+
+@fixture(scope='session', name='aiodi_base_container')
+def base_container(pytestconfig: Config) -> Container:
+    """Built once per session, override this fixture to build it differently."""
+    return ContainerBuilder(
+        filenames=pytestconfig.getini('aiodi_filenames') or None,
+        cwd=str(pytestconfig.rootpath / pytestconfig.getini('aiodi_cwd')),
+        environment=pytestconfig.getini('aiodi_environment') or None,
+    ).load()
+
+
+@fixture
+def aiodi_container(aiodi_base_container: Container) -> Iterator[Container]:
+    """A copy-on-write fork of the session container, thrown away after the test."""
+    yield aiodi_base_container.fork()
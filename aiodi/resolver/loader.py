@@ -1,6 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
+from glob import glob
 from pathlib import Path
 from typing import Any, Callable, MutableMapping, NamedTuple
 
+from ..helpers import deep_merge
 from . import Resolver
 from .path import PathData
 from .service import ServiceDefaults
@@ -9,17 +12,20 @@ InputData = str | Path
 OutputData = MutableMapping[str, Any] | dict[str, Any]
 
 
+def _overlaid(filepath: Path) -> Path:
+    """The file an environment overlay applies to, e.g. "log.toml" for "log.prod.toml", itself otherwise."""
+    return filepath.with_name(Path(filepath.stem).stem + filepath.suffix)
+
+
 class LoaderMetadata(NamedTuple):
     path_data: PathData
     decoders: dict[str, Callable[[InputData], OutputData]]
+    environment: str | None = None
 
     def decode(self) -> OutputData:
         for filepath in self.path_data.filepaths:
             if filepath.is_file() and filepath.exists():
-                ext = filepath.suffix[1:]
-                if ext not in self.decoders:
-                    raise NotImplemented('Missing {0} decoder to load dependencies'.format(ext.upper()))  # type: ignore
-                data = self.decoders[ext](filepath)
+                data = self.decode_layers(filepath=filepath, seen=())
 
                 data.setdefault('variables', {})
                 data.setdefault('services', {})
@@ -27,6 +33,60 @@ class LoaderMetadata(NamedTuple):
                 return data
         raise FileNotFoundError('Missing file to load dependencies')
 
+    def decode_layers(self, filepath: Path, seen: tuple[Path, ...]) -> OutputData:
+        """
+        Decode a file together with its layers, deep-merged in this order:
+        1. files listed in its "imports" key (relative to its directory, globs allowed), in the given order
+        2. the file itself
+        3. its environment overlay (e.g. "services.prod.toml" for "services.toml"), if any
+        """
+        if filepath in seen:
+            raise RecursionError('Circular import of <{0}>'.format(filepath))
+        seen = (*seen, filepath)
+
+        data = self.decode_file(filepath=filepath)
+        imports = data.pop('imports', [])
+        filepaths = self.compute_imports(
+            cwd=filepath.parent, imports=[imports] if isinstance(imports, str) else imports
+        )
+
+        if len(filepaths) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(filepaths), 8)) as executor:
+                layers = list(executor.map(lambda path: self.decode_layers(filepath=path, seen=seen), filepaths))
+        else:
+            layers = [self.decode_layers(filepath=path, seen=seen) for path in filepaths]
+
+        data = deep_merge(*layers, data)
+
+        if self.environment:
+            overlay = filepath.with_name('{0}.{1}{2}'.format(filepath.stem, self.environment, filepath.suffix))
+            if overlay.is_file() and overlay not in seen:
+                data = deep_merge(data, self.decode_layers(filepath=overlay, seen=seen))
+
+        return data
+
+    def decode_file(self, filepath: Path) -> OutputData:
+        ext = filepath.suffix[1:]
+        if ext not in self.decoders:
+            raise NotImplemented('Missing {0} decoder to load dependencies'.format(ext.upper()))  # type: ignore
+        return self.decoders[ext](filepath)
+
+    @staticmethod
+    def compute_imports(cwd: Path, imports: list[str]) -> list[Path]:
+        filepaths: list[Path] = []
+        for resource in imports:
+            path = Path(resource) if Path(resource).is_absolute() else cwd / resource
+            if any(char in resource for char in '*?['):
+                matches = [Path(match) for match in sorted(glob(str(path)))]
+                # overlays of matched files are only applied through them, for the active environment
+                overlays = {match for match in matches if _overlaid(match) != match and _overlaid(match) in matches}
+                filepaths += [match for match in matches if match not in overlays]
+            elif path.is_file():
+                filepaths.append(path)
+            else:
+                raise FileNotFoundError('Missing imported file <{0}>'.format(path))
+        return filepaths
+
 
 class LoadData(NamedTuple):
     variables: dict[str, Any]
@@ -66,6 +126,7 @@ class LoaderResolver(Resolver[LoaderMetadata, LoadData]):
         return LoaderMetadata(
             path_data=data['path_data'],
             decoders=data['decoders'],
+            environment=data.get('environment', None),
         )
 
     def parse_value(
@@ -1,9 +1,12 @@
 from abc import ABC
+from functools import partial
 from glob import glob
 from inspect import Parameter, signature
+from mmap import mmap
 from pathlib import Path
-from typing import Any, NamedTuple, Type, cast
+from typing import Any, Callable, NamedTuple, Type, cast
 
+from ..cache import CacheOptions, intercept
 from ..helpers import (
     import_module_and_get_attr,
     import_module_and_get_attrs,
@@ -11,10 +14,23 @@ from ..helpers import (
     is_primitive,
     re_finditer,
 )
+from ..instrument import SERVICE, span
+from ..scope import (
+    CACHED,
+    LAZY,
+    POOL,
+    REFRESH,
+    SCOPES,
+    SINGLETON,
+    ScopedService,
+    inject_scoped,
+)
+from ..tags import ServiceTag, TaggedServices, TagIndex, collection_item_type
 from . import Resolver, ValueNotFound, ValueResolutionPostponed
 
 _SERVICE_AUTOREGISTRATION_EXCLUDE_REGEX = r"^([.\w/]+)?({[\w/.*,]+})?$"
 _SVC_DEFAULTS = ...
+_CACHED_LIMITS = {'maxsize', 'max_bytes'}
 
 
 class ServiceDefaults(NamedTuple):
@@ -138,6 +154,14 @@ class ServiceMetadata(NamedTuple):
     arguments: dict[str, Any]
     params: list[Any]
     defaults: ServiceDefaults
+    threadsafe: bool = True
+    fork_safe: bool = True
+    post_fork: Callable[[Any], Any] | None = None
+    scope: str = SINGLETON
+    scope_options: dict[str, Any] = {}
+    tags: tuple[ServiceTag, ...] = ()
+    warmup: int | None = None
+    cache: dict[str, CacheOptions] = {}
 
     class ParameterMetadata(NamedTuple):  # type: ignore
         name: str
@@ -155,24 +179,38 @@ class ServiceMetadata(NamedTuple):
                     'svc'
                     if str(param[0]) in arguments and arguments[str(param[0])].startswith('@')
                     else (
-                        'arg'
-                        if str(param[0]) in arguments
+                        'tag'
+                        if str(param[0]) in arguments and arguments[str(param[0])].startswith('#')
                         else (
-                            'typ'
-                            if param[1].default is Parameter.empty and not is_primitive(param[1].annotation)
-                            else 'static'
+                            'arg'
+                            if str(param[0]) in arguments
+                            else (
+                                'col'
+                                if _is_service_collection(param[1])
+                                else (
+                                    'typ'
+                                    if param[1].default is Parameter.empty and not is_primitive(param[1].annotation)
+                                    else 'static'
+                                )
+                            )
                         )
                     )
                 ),
                 type=param[1].annotation,
                 default=(
                     arguments[str(param[0])]
-                    if str(param[0]) in arguments and arguments[str(param[0])].startswith('@')
+                    if str(param[0]) in arguments and arguments[str(param[0])].startswith(('@', '#'))
                     else None if param[1].default is Parameter.empty else param[1].default
                 ),
             )
 
 
+def _is_service_collection(param: Parameter) -> bool:
+    """Parameters without default typed as a collection of non builtin classes, e.g. list[Handler]."""
+    item_type = collection_item_type(param.annotation)
+    return param.default is Parameter.empty and item_type is not None and item_type.__module__ != 'builtins'
+
+
 class ServiceNotFound(ValueNotFound):
     def __init__(self, name: str) -> None:
         super().__init__(kind='Service', name=name)
@@ -218,6 +256,7 @@ class ServiceResolver(Resolver[ServiceMetadata, Any]):
             cls=val['class'] if isinstance(val, dict) and 'class' in val else _SVC_DEFAULTS,  # type: ignore
         )
         kwargs = val['arguments'] if isinstance(val, dict) and 'arguments' in val else {}
+        options: dict[str, Any] = val if isinstance(val, dict) else {}
         return ServiceMetadata(
             name=key,
             type=typ,
@@ -228,8 +267,77 @@ class ServiceResolver(Resolver[ServiceMetadata, Any]):
                 for param in signature(clazz).parameters.items()
             ],
             defaults=defaults,
+            threadsafe=bool(options.get('threadsafe', True)),
+            fork_safe=bool(options.get('fork_safe', 'post_fork' not in options)),
+            post_fork=import_module_and_get_attr(name=options['post_fork']) if 'post_fork' in options else None,
+            scope=self._define_service_scope(name=key, options=options),
+            scope_options=self._define_service_scope_options(name=key, options=options),
+            tags=tuple(ServiceTag.from_value(tag) for tag in options.get('tags', [])),
+            warmup=self._define_service_warmup(name=key, options=options),
+            cache=self._define_service_cache(name=key, typ=typ, options=options),
         )
 
+    @staticmethod
+    def _define_service_scope(name: str, options: dict[str, Any]) -> str:
+        if 'pool' in options:
+            default = POOL
+        elif 'refresh' in options:
+            default = REFRESH
+        elif 'cached' in options:
+            default = CACHED
+        elif options.get('lazy') or options.get('warmup'):
+            default = LAZY
+        else:
+            default = SINGLETON
+        scope = options.get('scope', default)
+        if scope != SINGLETON and scope not in SCOPES:
+            raise ValueError('Unknown scope <{0}> of service <{1}>'.format(scope, name))
+        return str(scope)
+
+    @staticmethod
+    def _define_service_warmup(name: str, options: dict[str, Any]) -> int | None:
+        """warmup = true, or an integer priority (higher first)"""
+        warmup = options.get('warmup', False)
+        if warmup is False:
+            return None
+        if options.get('scope', LAZY) != LAZY:
+            raise ValueError('Service <{0}> must be lazy to be warmed up'.format(name))
+        return 0 if warmup is True else int(warmup)
+
+    @staticmethod
+    def _define_service_cache(name: str, typ: Type[Any], options: dict[str, Any]) -> dict[str, CacheOptions]:
+        """cache = { find = { maxsize = 10000, ttl = 60 } }, per method name of the constructed type"""
+        cache = options.get('cache', {})
+        if not isinstance(cache, dict):
+            raise ValueError(
+                'Service <{0}> cache must be a table of methods, e.g. {{ find = {{ ttl = 60 }} }}'.format(name)
+            )
+        for method in cache:
+            if not callable(getattr(typ, method, None)):
+                raise ValueError('Service <{0}> has no method <{1}> to cache'.format(name, method))
+        return {method: CacheOptions.from_value(name=method, val=val) for method, val in cache.items()}
+
+    @staticmethod
+    def _define_service_scope_options(name: str, options: dict[str, Any]) -> dict[str, Any]:
+        if 'cached' in options:
+            cached = options['cached']
+            if options.get('scope', CACHED) != CACHED or not isinstance(cached, dict) or set(cached) - _CACHED_LIMITS:
+                raise ValueError('Service <{0}> cached must be a table of limits, e.g. {{ maxsize = 4 }}'.format(name))
+            return dict(cached)
+        if 'refresh' in options:
+            refresh = options['refresh']
+            if options.get('scope', REFRESH) != REFRESH or not isinstance(refresh, dict) or 'ttl' not in refresh:
+                raise ValueError(
+                    'Service <{0}> refresh must be a table with a ttl, e.g. {{ ttl = 300, jitter = 30 }}'.format(name)
+                )
+            return dict(refresh)
+        if 'pool' not in options:
+            return {}
+        pool = options['pool']
+        if options.get('scope', POOL) != POOL or not isinstance(pool, dict) or 'size' not in pool:
+            raise ValueError('Service <{0}> pool must be a table with a size, e.g. {{ size = 16 }}'.format(name))
+        return dict(pool)
+
     def parse_value(self, metadata: ServiceMetadata, retries: int, extra: dict[str, Any]) -> Any:
         _variables = cast(dict[str, Any], extra.get('variables'))
         _services = cast(dict[str, Any], extra.get('services'))
@@ -249,7 +357,7 @@ class ServiceResolver(Resolver[ServiceMetadata, Any]):
                         extra=extra,
                     ),
                     retries=-1,
-                    extra={'variables': _variables},
+                    extra={'variables': _variables, 'project_dir': metadata.defaults.project_dir},
                 )
             elif param.source_kind == 'svc':
                 if param_val[1:] in _services:
@@ -259,7 +367,11 @@ class ServiceResolver(Resolver[ServiceMetadata, Any]):
             elif param.source_kind == 'typ':
                 if not metadata.defaults.autowire:
                     raise ServiceNotFound(name=metadata.name)
-                services = [svc for svc in _services.values() if isinstance(svc, param.type)]
+                services = [
+                    svc
+                    for svc in _services.values()
+                    if isinstance(svc, param.type) or (isinstance(svc, ScopedService) and svc.provides(param.type))
+                ]
                 if len(services) == 1:
                     param_val = services[0]
                 else:
@@ -268,11 +380,55 @@ class ServiceResolver(Resolver[ServiceMetadata, Any]):
                         value=metadata,
                         times=retries + 1,
                     )
-            # cast primitive value
-            if param_val is not None and is_primitive(param.type):
+            elif param.source_kind in ('tag', 'col'):
+                if param.source_kind == 'col' and not metadata.defaults.autowire:
+                    raise ServiceNotFound(name=metadata.name)
+                param_val = self._collect(
+                    metadata=metadata, param=param, retries=retries, services=_services, extra=extra
+                )
+            # cast primitive value (mapped files are given as they are, not copied)
+            if param_val is not None and is_primitive(param.type) and not isinstance(param_val, mmap):
                 param_val = param.type(param_val)
             parameters.setdefault(param.name, param_val)
-        return metadata.clazz(**parameters)
+        if metadata.scope == SINGLETON and not metadata.tags:
+            return self.construct(metadata=metadata, parameters=parameters)
+        # tagged singletons are only constructed once looked up or reached in a collection
+        scope = LAZY if metadata.scope == SINGLETON else metadata.scope
+        options = dict(metadata.scope_options)
+        if scope == CACHED:
+            options['lru'] = extra.get('cached_services')  # the LRU of the container being built
+        return SCOPES[scope](
+            factory=partial(self.construct, metadata=metadata, parameters=parameters),
+            typ=metadata.type,
+            **options,
+        )
+
+    @staticmethod
+    def _collect(
+        metadata: ServiceMetadata, param: Any, retries: int, services: dict[str, Any], extra: dict[str, Any]
+    ) -> TaggedServices:
+        keys = [key for key in collection_keys(tags=extra.get('tags'), param=param) if key != metadata.name]
+        for key in keys:
+            if key not in services:
+                raise ServiceResolutionPostponed(key=key, value=metadata, times=retries + 1)
+        return TaggedServices((key, services[key]) for key in keys)
+
+    @staticmethod
+    def construct(metadata: ServiceMetadata, parameters: dict[str, Any]) -> Any:
+        """Instantiate the service, scoped dependencies are resolved for the current scope (pooled ones give their pool)."""
+        kwargs = {name: inject_scoped(val) for name, val in parameters.items()}
+        with span(SERVICE, metadata.name):
+            instance = metadata.clazz(**kwargs)
+        return intercept(instance, metadata.cache) if metadata.cache else instance
+
+
+def collection_keys(tags: TagIndex | None, param: Any) -> tuple[str, ...]:
+    """Members of a "#tag" argument or of a collection typed parameter, e.g. list[Handler], by priority."""
+    if tags is None:
+        return ()
+    if param.source_kind == 'tag':
+        return tags.tagged(param.default[1:])
+    return tags.providers(cast(type, collection_item_type(param.type)))
 
 
 def prepare_services_to_parse(
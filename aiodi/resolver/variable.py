@@ -1,10 +1,12 @@
+from mmap import ACCESS_READ, mmap
 from os import getenv
+from pathlib import Path
 from typing import Any, Match, NamedTuple, Type
 
 from ..helpers import raise_, re_finditer
 from . import Resolver, ValueNotFound, ValueResolutionPostponed
 
-REGEX = r"%(static|env|var)\(([str:int:float:bool:]*?)([\w]+)(,\s{1}'.*?')?\)%"
+REGEX = r"%(static|env|var)\(([str:int:float:bool:]*?)([\w]+)(,\s{1}'.*?')?\)%|%(file)\((mmap|bytes):([^%)]+)\)%"
 STATIC_TEMPLATE: str = "%static({0}:{1}, '{2}')%"
 _VAR_DEFAULTS = ...
 
@@ -20,9 +22,19 @@ class VariableMetadata(NamedTuple):
         source_name: str
         default: Any
         match: Match[Any]
+        mode: str | None = None  # "mmap" or "bytes" for file sources
 
         @classmethod
         def from_match(cls, match: Match[Any]) -> 'VariableMetadata.MatchMetadata':
+            if match.groups()[4] == 'file':
+                return cls(
+                    source_kind='file',
+                    types=[],
+                    source_name=str(match.groups()[6]).strip(),
+                    default=_VAR_DEFAULTS,
+                    match=match,
+                    mode=str(match.groups()[5]),
+                )
             raw_types = (
                 ['str']
                 if match.groups()[1] is None or len(str(match.groups()[1])) == 0
@@ -48,6 +60,11 @@ class EnvironmentVariableNotFound(ValueNotFound):
         super().__init__(kind='EnvironmentVariable', name=name)
 
 
+class FileNotFound(ValueNotFound):
+    def __init__(self, name: str) -> None:
+        super().__init__(kind='File', name=name)
+
+
 class VariableResolutionPostponed(ValueResolutionPostponed[VariableMetadata]):
     pass
 
@@ -101,13 +118,22 @@ class VariableResolver(Resolver[VariableMetadata, Any]):
                         raise VariableResolutionPostponed(key=metadata.name, value=metadata, times=retries + 1)
                     raise VariableNotFound(name=metadata.name)
                 typ_val = _variables.get(metadata_.source_name, metadata_.default)
+                if isinstance(typ_val, _BUFFERS):
+                    return self._whole_value(metadata=metadata, val=typ_val)
+            elif metadata_.source_kind == 'file':
+                return self._whole_value(
+                    metadata=metadata,
+                    val=read_file(
+                        path=metadata_.source_name, mode=str(metadata_.mode), project_dir=extra.get('project_dir', '')
+                    ),
+                )
             # concatenate right side content per iteration
             values += (
                 metadata.value[0 if idx == 0 else metadata.matches[idx - 1].match.end() : metadata_.match.start()]
                 + typ_val
             )
             # concatenate static content in last iteration
-            if (len(metadata) - 1) == idx:
+            if (len(metadata.matches) - 1) == idx:
                 values += metadata.value[metadata_.match.end() :]
         value: Any = ''.join(values)
         if len(metadata.matches) == 1:
@@ -116,6 +142,41 @@ class VariableResolver(Resolver[VariableMetadata, Any]):
                 value = type_(value)
         return value
 
+    @staticmethod
+    def _whole_value(metadata: VariableMetadata, val: Any) -> Any:
+        """Buffers are given as they are, so they can not be concatenated with other content."""
+        if len(metadata.matches) != 1 or metadata.matches[0].match.group(0) != metadata.value:
+            raise ValueError('Variable <{0}> file content can not be concatenated'.format(metadata.name))
+        return val
+
+
+_BUFFERS = (bytes, mmap)
+
+
+class MappedFile(mmap):
+    """A read-only mapping of a file, pickled as its path so other processes map the same pages."""
+
+    path: str
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return read_file, (self.path, 'mmap')
+
+
+def read_file(path: str, mode: str, project_dir: str = '') -> bytes | mmap:
+    """
+    Content of a file relative to the project dir: "bytes" reads a copy, "mmap" maps it read-only, so every process
+    mapping the same file shares its pages through the page cache.
+    """
+    filepath = Path(project_dir or '.', path)
+    if not filepath.is_file():
+        raise FileNotFound(name=str(filepath))
+    if mode == 'bytes':
+        return filepath.read_bytes()
+    with open(filepath, 'rb') as file:
+        mapped = MappedFile(file.fileno(), 0, access=ACCESS_READ)
+    mapped.path = str(filepath.absolute())
+    return mapped
+
 
 def prepare_variables_to_parse(
     resolver: Resolver[Any, Any], items: dict[str, Any], extra: dict[str, Any]  # pylint: disable=W0613
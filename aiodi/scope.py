@@ -0,0 +1,511 @@
+import os
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextvars import ContextVar
+from sys import modules
+from threading import Condition, Lock, RLock, Timer, local
+from time import monotonic, perf_counter
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Callable, Type
+from weakref import WeakKeyDictionary, WeakSet, ref
+
+from .pool import InstancePool, PoolLease
+
+if TYPE_CHECKING:  # pragma: no cover
+    from asyncio import AbstractEventLoop, Task
+
+SINGLETON = 'singleton'
+TASK = 'task'
+LOOP = 'loop'
+POOL = 'pool'
+LAZY = 'lazy'
+REFRESH = 'refresh'
+CACHED = 'cached'
+
+
+class ScopedService(ABC):
+    """Placeholder kept in a container slot instead of an instance, resolving one on each lookup."""
+
+    __slots__ = ('_factory', '_type', '__weakref__')
+
+    def __init__(self, factory: Callable[[], Any], typ: Type[Any] | None = None) -> None:
+        self._factory = factory
+        self._type = typ
+
+    @property
+    def type(self) -> Type[Any] | None:
+        return self._type
+
+    def provides(self, typ: Any) -> bool:
+        return isinstance(self._type, type) and isinstance(typ, type) and issubclass(self._type, typ)
+
+    @abstractmethod
+    def resolve(self) -> Any:
+        """The instance to hand out for the current lookup."""
+
+    def _construct(self) -> Any:
+        start = perf_counter()
+        try:
+            return self._factory()
+        finally:
+            constructions.count += 1
+            constructions.seconds += perf_counter() - start
+
+
+class _Constructions(local):
+    """Instances constructed by scoped services in the current thread, and the seconds it took."""
+
+    count = 0
+    seconds = 0.0
+
+
+constructions = _Constructions()
+
+
+# asyncio is only looked up once imported by someone else, no loop can run before
+
+
+def _current_task() -> 'Task[Any] | None':
+    asyncio = modules.get('asyncio')
+    try:
+        return None if asyncio is None else asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+def _running_loop() -> 'AbstractEventLoop | None':
+    asyncio = modules.get('asyncio')
+    try:
+        return None if asyncio is None else asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class TaskScopedService(ScopedService):
+    """
+    One instance per asyncio task (or per context, outside of tasks), kept in a context variable and released when
+    the task finishes.
+    """
+
+    __slots__ = ('_var',)
+
+    def __init__(self, factory: Callable[[], Any], typ: Type[Any] | None = None) -> None:
+        super().__init__(factory, typ)
+        self._var: ContextVar[list[Any]] = ContextVar('aiodi_task_scoped_{0}'.format(id(self)))
+
+    def resolve(self) -> Any:
+        task = _current_task()
+        cell = self._var.get(None)
+        if cell and cell[0] is task:
+            return cell[1]
+        cell = [task, self._construct()]
+        self._var.set(cell)
+        if task is not None:
+            task.add_done_callback(lambda _: cell.clear())
+        return cell[1]
+
+
+async def _close(instance: Any) -> None:
+    from inspect import isawaitable
+
+    close = getattr(instance, 'aclose', None) or getattr(instance, 'close', None)
+    if callable(close):
+        result = close()
+        if isawaitable(result):
+            await result
+
+
+class LoopScopedService(ScopedService):
+    """
+    One instance per running event loop, kept in a weak map keyed by the loop. Instances are closed (aclose() or
+    close(), awaited if needed) when the loop shuts down its asynchronous generators, as asyncio.run() does.
+    """
+
+    __slots__ = ('_instances', '_lock')
+
+    def __init__(self, factory: Callable[[], Any], typ: Type[Any] | None = None) -> None:
+        super().__init__(factory, typ)
+        self._instances: 'WeakKeyDictionary[AbstractEventLoop, tuple[Any, AsyncGenerator[None, None]]]' = (
+            WeakKeyDictionary()
+        )
+        self._lock = Lock()
+
+    def resolve(self) -> Any:
+        loop = _running_loop()
+        if loop is None:
+            raise RuntimeError('Loop scoped services require a running event loop')
+        found = self._instances.get(loop)
+        if found is not None:
+            return found[0]
+        with self._lock:
+            found = self._instances.get(loop)
+            if found is None:
+                instance = self._construct()
+                found = (instance, self._lifetime(instance=instance, loop=ref(loop)))
+                self._instances[loop] = found
+                # first iteration registers the generator in the running loop, to be closed on its shutdown
+                try:
+                    found[1].asend(None).send(None)
+                except StopIteration:
+                    pass
+        return found[0]
+
+    async def _lifetime(self, instance: Any, loop: 'ref[AbstractEventLoop]') -> AsyncGenerator[None, None]:
+        try:
+            yield
+        finally:
+            owner = loop()
+            if owner is not None:
+                self._instances.pop(owner, None)
+            await _close(instance)
+
+
+class PooledService(ScopedService):
+    """
+    Instances shared through a bounded pool (options: size, max_idle in seconds), each lookup handing out a new lease
+    to acquire one.
+    """
+
+    __slots__ = ('_pool',)
+
+    def __init__(self, factory: Callable[[], Any], typ: Type[Any] | None = None, **options: Any) -> None:
+        super().__init__(factory, typ)
+        self._pool = InstancePool(factory=self._construct, size=int(options['size']), max_idle=options.get('max_idle'))
+
+    @property
+    def pool(self) -> InstancePool:
+        return self._pool
+
+    def resolve(self) -> PoolLease:
+        return self._pool.lease()
+
+
+class _Demand:
+    """Count of lazy constructions requested by lookups in flight, which background warm-ups wait for."""
+
+    def __init__(self) -> None:
+        self._count = 0
+        self._cond = Condition()
+        self.local = local()
+
+    def __enter__(self) -> None:
+        with self._cond:
+            self._count += 1
+
+    def __exit__(self, *args: Any) -> None:
+        with self._cond:
+            self._count -= 1
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self._count == 0, timeout)
+
+
+demand = _Demand()
+_UNSET = object()
+
+
+class LazyService(ScopedService):
+    """A singleton constructed on its first lookup, or beforehand by a warm-up, instead of when building."""
+
+    __slots__ = ('_instance', '_lock')
+
+    def __init__(self, factory: Callable[[], Any], typ: Type[Any] | None = None) -> None:
+        super().__init__(factory, typ)
+        self._instance: Any = _UNSET
+        self._lock = Lock()
+
+    @property
+    def built(self) -> bool:
+        return self._instance is not _UNSET
+
+    def resolve(self) -> Any:
+        instance = self._instance
+        if instance is not _UNSET:
+            return instance
+        if getattr(demand.local, 'warming', False):
+            return self._build()
+        with demand:
+            return self._build()
+
+    def warm(self) -> None:
+        """Construct it in background, its lazy dependencies are not counted as demand."""
+        demand.local.warming = True
+        try:
+            self._build()
+        finally:
+            demand.local.warming = False
+
+    def _build(self) -> Any:
+        with self._lock:
+            if self._instance is _UNSET:
+                self._instance = self._construct()
+            return self._instance
+
+
+class RefreshingService(ScopedService):
+    """
+    A singleton rebuilt in a background thread every ttl seconds (options: ttl, jitter in seconds), minus up to jitter
+    so processes do not rebuild at once. The new instance replaces the previous one once constructed, lookups never
+    wait for it. A failed rebuild keeps the previous instance and is retried after a tenth of ttl. Background rebuilds
+    start on the first lookup, so e.g. services rebuilt by derived containers never looked up run no timer thread.
+    """
+
+    __slots__ = ('_instance', '_ttl', '_jitter', '_timer', '_lock', '_started', '_stopped', 'refreshed_at', 'errors')
+
+    def __init__(self, factory: Callable[[], Any], typ: Type[Any] | None = None, **options: Any) -> None:
+        super().__init__(factory, typ)
+        self._ttl = float(options['ttl'])
+        self._jitter = float(options.get('jitter', 0))
+        if self._ttl <= 0 or not 0 <= self._jitter < self._ttl:
+            raise ValueError('Refresh ttl must be positive and jitter lower than it')
+        self._timer: Timer | None = None
+        self._lock = Lock()
+        self._started = False
+        self._stopped = False
+        self.errors = 0
+        self._instance = self._construct()
+        self.refreshed_at = monotonic()
+        _refreshing.add(self)
+
+    def resolve(self) -> Any:
+        if not self._started:
+            self._schedule(self._remaining(self._delay()))
+        return self._instance
+
+    def refresh(self) -> bool:
+        """Rebuild it now in the calling thread, False if failed."""
+        try:
+            instance = self._construct()
+        except Exception as err:  # pylint: disable=W0703
+            from .logger import get_logger
+
+            get_logger().warning('Refreshing {0} failed: {1!r}'.format(self._type, err))
+            self.errors += 1
+            self._schedule(self._ttl / 10)
+            return False
+        self._instance = instance
+        self.refreshed_at = monotonic()
+        self._schedule(self._delay())
+        return True
+
+    def stop(self) -> None:
+        """Cancel background rebuilds, the current instance is kept."""
+        with self._lock:
+            self._stopped = True
+            if self._timer is not None:
+                self._timer.cancel()
+
+    def _delay(self) -> float:
+        from random import uniform
+
+        return self._ttl - uniform(0, self._jitter)
+
+    def _remaining(self, delay: float) -> float:
+        return max(0.0, delay - (monotonic() - self.refreshed_at))
+
+    def _schedule(self, delay: float) -> None:
+        with self._lock:
+            if self._stopped:
+                return
+            if self._timer is not None:
+                self._timer.cancel()
+            self._started = True
+            self._timer = Timer(delay, _refresh, args=(ref(self),))
+            self._timer.name = 'aiodi-refresh'
+            self._timer.daemon = True
+            self._timer.start()
+
+
+def _refresh(service: 'ref[RefreshingService]') -> None:
+    found = service()
+    if found is not None:
+        found.refresh()
+
+
+_refreshing: 'WeakSet[RefreshingService]' = WeakSet()
+
+
+def _reschedule() -> None:
+    """Timer threads do not survive fork(), those of refreshing services are started again in children."""
+    for service in list(_refreshing):
+        service._lock = Lock()
+        if service._started:
+            service._schedule(service._remaining(service._ttl))
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reschedule)
+
+
+class ServiceLRU:
+    """
+    Instances of the cached services of a container, least recently used first. Each is dropped once it is kept with
+    more than its own maxsize instances, or max_bytes (estimated with deep_size, so including what they reference),
+    counting itself and those used after it.
+
+    e.g.
+    container.cached_services().stats()  # {'size': 2, 'bytes': 104857600, 'evictions': 0}
+    container.cached_services().evict()  # e.g. on memory pressure, returns the estimated bytes released
+    """
+
+    def __init__(self) -> None:
+        self._entries: 'OrderedDict[ref[CachedService], int]' = OrderedDict()
+        self._bytes = 0
+        self._lock = RLock()
+        self.measured = False  # sizes are only estimated once a service declares max_bytes
+        self.evictions = 0
+
+    def touch(self, service: 'CachedService') -> None:
+        with self._lock:
+            if service._entry in self._entries:
+                self._entries.move_to_end(service._entry)
+                self._shrink()
+
+    def add(self, service: 'CachedService', size: int) -> None:
+        with self._lock:
+            self._entries[service._entry] = size
+            self._bytes += size
+            self._shrink()
+
+    def discard(self, entry: 'ref[CachedService]') -> None:
+        with self._lock:
+            self._bytes -= self._entries.pop(entry, 0)
+
+    def evict(self, count: int | None = None) -> int:
+        """Drop the count least recently used instances (all by default), returns their estimated bytes."""
+        released = 0
+        with self._lock:
+            for entry in list(self._entries)[: len(self._entries) if count is None else count]:
+                released += self._drop(entry)
+        return released
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {'size': len(self._entries), 'bytes': self._bytes, 'evictions': self.evictions}
+
+    def _shrink(self) -> None:
+        count, size = 0, 0
+        for entry in reversed(list(self._entries)):
+            service = entry()
+            if service is not None and service._exceeds(count + 1, size + self._entries[entry]):
+                self._drop(entry)
+            else:
+                count, size = count + 1, size + self._entries[entry]
+
+    def _drop(self, entry: 'ref[CachedService]') -> int:
+        size = self._entries.pop(entry)
+        self._bytes -= size
+        self.evictions += 1
+        service = entry()
+        if service is not None:
+            service._release()
+        return size
+
+
+class CachedService(ScopedService):
+    """
+    A singleton constructed on its first lookup and kept in the LRU of its container (options: maxsize, max_bytes).
+    Once evicted, the next lookup gets it again while something else keeps it alive (weak reference), or constructs
+    a new one.
+    """
+
+    __slots__ = ('_instance', '_weak', '_lock', '_lru', '_entry', '_maxsize', '_max_bytes', 'builds')
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        typ: Type[Any] | None = None,
+        lru: ServiceLRU | None = None,
+        **options: Any,
+    ) -> None:
+        super().__init__(factory, typ)
+        self._instance: Any = _UNSET
+        self._weak: 'ref[Any] | None' = None
+        self._lock = Lock()
+        self._lru = ServiceLRU() if lru is None else lru
+        self._entry = ref(self, self._lru.discard)
+        self._maxsize = None if options.get('maxsize') is None else int(options['maxsize'])
+        self._max_bytes = None if options.get('max_bytes') is None else int(options['max_bytes'])
+        self._lru.measured = self._lru.measured or self._max_bytes is not None
+        self.builds = 0
+
+    def resolve(self) -> Any:
+        instance = self._instance
+        if instance is _UNSET:
+            return self._build()
+        self._lru.touch(self)
+        return instance
+
+    def _build(self) -> Any:
+        with self._lock:
+            instance = self._instance
+            if instance is not _UNSET:
+                return instance
+            instance = None if self._weak is None else self._weak()
+            if instance is None:
+                instance = self._construct()
+                self.builds += 1
+            try:
+                self._weak = ref(instance)
+            except TypeError:
+                self._weak = None
+            self._instance = instance
+        self._lru.add(self, deep_size(instance) if self._lru.measured else 0)
+        return instance
+
+    def bind(self, lru: ServiceLRU) -> 'CachedService':
+        """A copy kept in another LRU, e.g. of a derived container, getting the instance of this one while alive."""
+        bound = CachedService(self._factory, self._type, lru=lru, maxsize=self._maxsize, max_bytes=self._max_bytes)
+        bound._weak = self._weak
+        return bound
+
+    def _exceeds(self, count: int, size: int) -> bool:
+        return (self._maxsize is not None and count > self._maxsize) or (
+            self._max_bytes is not None and size > self._max_bytes
+        )
+
+    def _release(self) -> None:
+        self._instance = _UNSET
+
+
+def deep_size(val: Any) -> int:
+    """Approximate bytes of an object and of what it references, classes, modules and functions excluded."""
+    from gc import get_referents
+    from sys import getsizeof
+    from types import BuiltinFunctionType, FunctionType, ModuleType
+
+    excluded = (type, ModuleType, FunctionType, BuiltinFunctionType, ScopedService)
+    seen: set[int] = set()
+    pending = [val]
+    size = 0
+    while pending:
+        item = pending.pop()
+        if id(item) in seen or isinstance(item, excluded):
+            continue
+        seen.add(id(item))
+        size += getsizeof(item)
+        pending += get_referents(item)
+    return size
+
+
+SCOPES: dict[str, Type[ScopedService]] = {
+    TASK: TaskScopedService,
+    LOOP: LoopScopedService,
+    POOL: PooledService,
+    LAZY: LazyService,
+    REFRESH: RefreshingService,
+    CACHED: CachedService,
+}
+
+
+def resolve_scoped(val: Any) -> Any:
+    return val.resolve() if isinstance(val, ScopedService) else val
+
+
+def inject_scoped(val: Any) -> Any:
+    """
+    The value a dependent service is given: the pool of a pooled service (a single lease could not be entered by
+    concurrent uses), the instance of the current scope otherwise.
+    """
+    return val.pool if isinstance(val, PooledService) else resolve_scoped(val)
@@ -0,0 +1,66 @@
+from typing import Any, NamedTuple
+
+from .container import Container
+from .instrument import PHASE, span
+from .plan import BuildPlan
+from .resolver.service import ServiceMetadata
+
+
+class ContainerSnapshot(NamedTuple):
+    """
+    Picklable build plan of a container: variable values and service metadata in construction order. Loading it
+    constructs the services again, without path discovery, TOML decoding, autoregistration scans nor retries.
+    Services set or overridden on the container afterwards are not part of it.
+
+    e.g.
+    snapshot = container.snapshot()
+    ProcessPoolExecutor(initializer=worker_initializer, initargs=(snapshot,), mp_context=get_context('spawn'))
+    """
+
+    variables: dict[str, Any]
+    services: dict[str, ServiceMetadata]  # in construction order
+    variables_key: str = 'env'
+    variable_sources: dict[str, Any] = {}
+
+    @classmethod
+    def from_plan(cls, plan: BuildPlan) -> 'ContainerSnapshot':
+        order = plan.order or tuple(plan.graph.order(plan.services.keys()))
+        return cls(
+            variables=dict(plan.variables),
+            services={key: plan.services[key] for key in order if key in plan.services},
+            variables_key=plan.variables_key,
+            variable_sources=dict(plan.variable_sources),
+        )
+
+    def load(self) -> Container:
+        plan = BuildPlan.from_services(
+            variables=dict(self.variables),
+            services=self.services,
+            variables_key=self.variables_key,
+            variable_sources=self.variable_sources,
+        )._replace(order=tuple(self.services.keys()))
+        services: dict[str, Any] = {}
+        with span(PHASE, 'service'):
+            for key in self.services:
+                services[key] = plan.construct(key=key, services=services)
+        container = Container(
+            items=[(self.variables_key, plan.variables, {}), *[(key, val, {}) for key, val in services.items()]]
+        )
+        container.plan = plan
+        return container
+
+
+_worker_container: Container | None = None
+
+
+def worker_initializer(snapshot: ContainerSnapshot) -> None:
+    """Initializer of process pool workers, loading the container of the snapshot once per worker."""
+    global _worker_container  # pylint: disable=W0603
+    _worker_container = snapshot.load()
+
+
+def worker_container() -> Container:
+    """The container loaded by worker_initializer in this process."""
+    if _worker_container is None:
+        raise RuntimeError('No container loaded in this process, use worker_initializer as pool initializer')
+    return _worker_container
@@ -0,0 +1,115 @@
+from collections.abc import Collection, Iterable, Sequence
+from typing import Any, Iterator, Mapping, NamedTuple, get_args, get_origin, overload
+
+from .scope import resolve_scoped
+
+_COLLECTIONS = (list, Iterable, Sequence, Collection)
+
+
+class ServiceTag(NamedTuple):
+    name: str
+    priority: int = 0
+
+    @classmethod
+    def from_value(cls, val: Any) -> 'ServiceTag':
+        """e.g. "event_handler" or { name = "event_handler", priority = 10 }"""
+        if isinstance(val, str):
+            return cls(name=val)
+        if isinstance(val, dict) and 'name' in val:
+            return cls(name=str(val['name']), priority=int(val.get('priority', 0)))
+        raise ValueError('Invalid tag <{0}>, expected a name or a table with name and priority'.format(val))
+
+
+def collection_item_type(typ: Any) -> type | None:
+    """The item type of list[T], Iterable[T], Sequence[T] or Collection[T] annotations, None otherwise."""
+    if get_origin(typ) not in _COLLECTIONS:
+        return None
+    args = get_args(typ)
+    return args[0] if len(args) == 1 and isinstance(args[0], type) else None
+
+
+class TagIndex:
+    """Service keys per tag and per provided type, ordered by descending priority then declaration order."""
+
+    __slots__ = ('_tags', '_types', '_cache')
+
+    def __init__(self, tags: Mapping[str, Iterable[ServiceTag]], types: Mapping[str, Any]) -> None:
+        order = {key: index for index, key in enumerate(types)}
+        by_tag: dict[str, list[tuple[int, int, str]]] = {}
+        priorities: dict[str, int] = {}
+        for key, items in tags.items():
+            for tag in items:
+                by_tag.setdefault(tag.name, []).append((-tag.priority, order.get(key, len(order)), key))
+                priorities[key] = max(priorities.get(key, tag.priority), tag.priority)
+        self._tags: dict[str, tuple[str, ...]] = {
+            name: tuple(key for _, _, key in sorted(items)) for name, items in by_tag.items()
+        }
+        self._types: tuple[tuple[str, Any], ...] = tuple(
+            sorted(types.items(), key=lambda item: (-priorities.get(item[0], 0), order[item[0]]))
+        )
+        self._cache: dict[type, tuple[str, ...]] = {}
+
+    @classmethod
+    def from_services(cls, services: Mapping[str, Any]) -> 'TagIndex':
+        """Index ServiceMetadata values by their tags and types."""
+        return cls(
+            tags={key: metadata.tags for key, metadata in services.items()},
+            types={key: metadata.type for key, metadata in services.items()},
+        )
+
+    def names(self) -> list[str]:
+        return list(self._tags.keys())
+
+    def tagged(self, name: str) -> tuple[str, ...]:
+        return self._tags.get(name, ())
+
+    def providers(self, typ: type) -> tuple[str, ...]:
+        """Keys of services whose type is a subclass of typ."""
+        if typ not in self._cache:
+            self._cache[typ] = tuple(
+                key for key, svc_type in self._types if isinstance(svc_type, type) and issubclass(svc_type, typ)
+            )
+        return self._cache[typ]
+
+
+class TaggedServices(Sequence[Any]):
+    """
+    Lazy and ordered collection of services, the Sequence given to "#tag" arguments and to parameters annotated as
+    list[T], Sequence[T] or Iterable[T] (not a list). Scoped members, tagged singletons included, are only resolved
+    when reached. Untagged singletons of list[T] collections are constructed when building, as any singleton.
+
+    e.g.
+    for handler in container.tagged('event_handler'):
+        if handler.handles(event):
+            handler(event)
+    """
+
+    __slots__ = ('_keys', '_values')
+
+    def __init__(self, items: Iterable[tuple[str, Any]]) -> None:
+        items = tuple(items)
+        self._keys = tuple(key for key, _ in items)
+        self._values = tuple(val for _, val in items)
+
+    def keys(self) -> tuple[str, ...]:
+        return self._keys
+
+    @overload
+    def __getitem__(self, index: int) -> Any: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> 'TaggedServices': ...
+
+    def __getitem__(self, index: int | slice) -> Any:
+        if isinstance(index, slice):
+            return TaggedServices(zip(self._keys[index], self._values[index]))
+        return resolve_scoped(self._values[index])
+
+    def __iter__(self) -> Iterator[Any]:
+        return (resolve_scoped(val) for val in self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return '{0}({1})'.format(self.__class__.__name__, ', '.join(self._keys))
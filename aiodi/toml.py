@@ -1,5 +1,8 @@
+from copy import deepcopy
 from pathlib import Path
+from threading import Lock
 from typing import Any, Callable, MutableMapping, cast
+from weakref import WeakKeyDictionary
 
 TOMLDecoded = MutableMapping[str, Any] | dict[str, Any]
 TOMLPath = str | Path
@@ -90,10 +93,55 @@ _decoders = [
 ]
 
 
+_lazy_decoder: TOMLDecoder | None = None
+
+
 def lazy_toml_decoder() -> TOMLDecoder:
+    """The first available decoder, the same one on each call so builders share its parsed files."""
+    global _lazy_decoder  # pylint: disable=W0603
+    if _lazy_decoder is not None:
+        return _lazy_decoder
     for decoder in _decoders:
         try:
-            return decoder()
+            _lazy_decoder = decoder()
+            return _lazy_decoder
         except (ModuleNotFoundError, ImportError):
             continue
     raise RuntimeError('Missing TOML decoder library to use aiodi')
+
+
+# parsed files per decoder, so builders given different decoders do not share results
+_cache: 'WeakKeyDictionary[TOMLDecoder, dict[Path, tuple[tuple[int, int], TOMLDecoded]]]' = WeakKeyDictionary()
+_cache_lock = Lock()
+
+
+def cached_toml_decoder(decoder: TOMLDecoder) -> TOMLDecoder:
+    """
+    Wrap decoder so each file is parsed once per process and decoder while its mtime and size do not change.
+    Every call returns a deep copy because loaded data is mutated later on.
+    """
+    try:
+        with _cache_lock:
+            files = _cache.setdefault(decoder, {})
+    except TypeError:  # not weakly referenceable, e.g. a builtin function
+        files = {}
+
+    def decorator(path: TOMLPath) -> TOMLDecoded:
+        filepath = Path(path).absolute()
+        stat = filepath.stat()
+        version = (stat.st_mtime_ns, stat.st_size)
+        with _cache_lock:
+            cached = files.get(filepath)
+        if cached is None or cached[0] != version:
+            cached = (version, decoder(filepath))
+            with _cache_lock:
+                files[filepath] = cached
+        return deepcopy(cached[1])
+
+    return decorator
+
+
+def clear_toml_cache() -> None:
+    with _cache_lock:
+        for files in _cache.values():
+            files.clear()
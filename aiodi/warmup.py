@@ -0,0 +1,71 @@
+from contextvars import copy_context
+from threading import Event, Thread
+from time import sleep
+from typing import Any, Iterable
+
+from .scope import LazyService, demand
+
+
+class Warmup:
+    """
+    Background construction of lazy services, in the given order, on a daemon thread. Lookups take priority: before
+    each service, the warm-up waits for the lazy constructions requested by lookups in flight.
+
+    e.g.
+    warmup = container.warmup()
+    health = {'ready': warmup.ready}
+    """
+
+    def __init__(self, services: Iterable[tuple[str, LazyService]]) -> None:
+        self._services = tuple(services)
+        self._errors: dict[str, BaseException] = {}
+        self._finished = Event()
+        self._stopped = False
+        self._thread: Thread | None = None
+
+    def start(self) -> 'Warmup':
+        if self._thread is None:
+            self._thread = Thread(target=copy_context().run, args=(self._run,), name='aiodi-warmup', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop after the service being constructed, the remaining ones are constructed on their first lookup."""
+        self._stopped = True
+
+    def _run(self) -> None:
+        try:
+            for key, svc in self._services:
+                if self._stopped:
+                    break
+                demand.wait_idle()
+                try:
+                    svc.warm()
+                except Exception as err:  # pylint: disable=W0703
+                    self._errors[key] = err
+                sleep(0)  # let other threads run between services
+        finally:
+            self._finished.set()
+
+    @property
+    def ready(self) -> bool:
+        """Whether every service is constructed, by the warm-up or by lookups."""
+        return all(svc.built for _, svc in self._services)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        self._finished.wait(timeout)
+        return self.ready
+
+    def status(self) -> dict[str, Any]:
+        """
+        e.g.
+        {'ready': False, 'built': 3, 'total': 5, 'pending': ['Search', 'Model'], 'errors': {}}
+        """
+        pending = [key for key, svc in self._services if not svc.built]
+        return {
+            'ready': len(pending) == 0,
+            'built': len(self._services) - len(pending),
+            'total': len(self._services),
+            'pending': pending,
+            'errors': {key: repr(err) for key, err in self._errors.items()},
+        }
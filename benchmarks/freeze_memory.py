@@ -0,0 +1,68 @@
+"""
+Memory retained by a Container against its frozen representation.
+
+e.g.
+python3 -m benchmarks.freeze_memory --services 10000
+"""
+
+from argparse import ArgumentParser
+from gc import collect
+from json import dumps
+from tracemalloc import get_traced_memory, start, stop
+
+from aiodi import Container
+
+
+class Service:
+    __slots__ = ('index',)
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+
+
+def _traced(fn):  # type: ignore
+    collect()
+    before = get_traced_memory()[0]
+    result = fn()
+    collect()
+    return result, get_traced_memory()[0] - before
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument('--services', type=int, default=10_000)
+    parser.add_argument('--modules', type=int, default=500)
+    args = parser.parse_args()
+
+    services = [
+        ('app.module_{0}.Service{1}'.format(index % args.modules, index), Service(index))
+        for index in range(args.services)
+    ]
+    start()
+
+    def build() -> Container:
+        container = Container({'env': {'name': 'benchmark', 'debug': False}})
+        for key, val in services:
+            container.set(key, val)
+        return container
+
+    container, container_bytes = _traced(build)
+    frozen, frozen_bytes = _traced(container.freeze)
+    stop()
+
+    assert all(frozen.get(key) is val for key, val in services)
+    print(
+        dumps(
+            {
+                'services': args.services,
+                'container_bytes': container_bytes,
+                'frozen_bytes': frozen_bytes,
+                'ratio': round(frozen_bytes / container_bytes, 3),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Import time of aiodi entry points, measured with "python -X importtime" in fresh interpreters, and the modules each one
+must not load (e.g. "from aiodi import Container" must not import the builder, resolvers or asyncio).
+
+e.g.
+python3 -m benchmarks.importtime --output var/benchmarks/importtime.json
+python3 -m benchmarks.importtime --diff var/benchmarks/importtime.json --max-slowdown 0.2
+"""
+
+from argparse import ArgumentParser
+from json import dumps, loads
+from pathlib import Path
+from statistics import median
+from subprocess import run as run_process
+from sys import executable
+from typing import Any
+
+_HEAVY = (
+    'aiodi.builder',
+    'aiodi.resolver',
+    'aiodi.toml',
+    'asyncio',
+    'concurrent.futures',
+    'glob',
+    'inspect',
+    'json',
+    'logging',
+    'pkgutil',
+    'tracemalloc',
+)
+
+# statement: modules it must not import
+STATEMENTS: dict[str, tuple[str, ...]] = {
+    'import aiodi': ('aiodi.container', *_HEAVY),
+    'from aiodi import Container': _HEAVY,
+    "from aiodi import Container; Container({'a': 1}).get('a')": _HEAVY,
+    'from aiodi import ContainerBuilder': (),
+}
+
+
+def importtime(statement: str) -> dict[str, tuple[int, bool]]:
+    """Cumulative microseconds per module imported by statement in a fresh interpreter, and if imported at top level."""
+    process = run_process([executable, '-X', 'importtime', '-c', statement], capture_output=True, text=True, check=True)
+    modules: dict[str, tuple[int, bool]] = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:') :].split('|')
+        modules[name.strip()] = (int(cumulative), not name.startswith('  '))
+    return modules
+
+
+def measure(statement: str, repeat: int = 10) -> dict[str, Any]:
+    """Median and best import time of the aiodi modules (excluding the interpreter startup), over repeat runs."""
+    baseline = set(importtime('pass'))
+    runs = [importtime(statement) for _ in range(repeat)]
+    totals = [sum(us for name, (us, top) in modules.items() if top and name not in baseline) for modules in runs]
+    imported = sorted(set(runs[0]) - baseline)
+    forbidden = [name for name in STATEMENTS.get(statement, ()) if name in imported]
+    return {
+        'median_ms': median(totals) / 1e3,
+        'best_ms': min(totals) / 1e3,
+        'modules': len(imported),
+        'unexpected': forbidden,
+    }
+
+
+def main() -> int:
+    parser = ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--output', default=None, help='write results as JSON')
+    parser.add_argument('--diff', default=None, help='JSON results of a previous run to compare with')
+    parser.add_argument('--max-slowdown', type=float, default=None, help='fail past this median ratio, e.g. 0.2')
+    args = parser.parse_args()
+
+    previous = loads(Path(args.diff).read_text(encoding='utf-8'))['results'] if args.diff else {}
+    results: dict[str, dict[str, Any]] = {}
+    failed = False
+    print('{0:<60} {1:>10} {2:>10} {3:>8} {4:>10}'.format('', 'median ms', 'best ms', 'modules', 'vs prev'))
+    for statement in STATEMENTS:
+        result = results[statement] = measure(statement, repeat=args.repeat)
+        change = ''
+        if statement in previous:
+            ratio = result['median_ms'] / previous[statement]['median_ms'] - 1
+            change = '{0:+.1%}'.format(ratio)
+            failed = failed or (args.max_slowdown is not None and ratio > args.max_slowdown)
+        print(
+            '{0:<60} {1:>10.1f} {2:>10.1f} {3:>8} {4:>10}'.format(
+                statement, result['median_ms'], result['best_ms'], result['modules'], change
+            )
+        )
+        if result['unexpected']:
+            failed = True
+            print('  imports {0}'.format(', '.join(result['unexpected'])))
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(dumps({'results': results}, indent=2), encoding='utf-8')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,259 @@
+"""
+Operations per second and allocations of Container and resolver hot paths, optionally against plain-dict equivalents.
+
+e.g.
+python3 -m benchmarks.micro --compare --output var/benchmarks/micro.json
+python3 -m benchmarks.micro --filter get_ --diff var/benchmarks/micro.json
+"""
+
+from argparse import ArgumentParser
+from json import dumps, loads
+from os import getenv
+from pathlib import Path
+from platform import python_version
+from time import perf_counter
+from tracemalloc import get_traced_memory, reset_peak, start, stop
+from typing import Any, Callable
+
+from aiodi import Container, __version__
+from aiodi.helpers import fqdn
+from aiodi.resolver.service import ServiceDefaults, ServiceResolver
+from aiodi.resolver.variable import VariableResolver
+
+Scenario = tuple[Callable[[], Any], Callable[[], Any] | None]
+
+
+class Repository:
+    pass
+
+
+class Finder:
+    def __init__(self, repository: Repository, name: str = 'finder') -> None:
+        self.repository = repository
+        self.name = name
+
+
+class Service:
+    __slots__ = ('index',)
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+
+
+def _chain(count: int) -> list[type]:
+    """Classes each depending on the previous one through an annotated parameter."""
+    classes: list[type] = []
+    for index in range(count):
+        namespace: dict[str, Any] = {'__module__': __name__}
+        if index == 0:
+            namespace['__init__'] = lambda self: None
+        else:
+
+            def __init__(self: Any, dep: Any) -> None:
+                self.dep = dep
+
+            __init__.__annotations__ = {'dep': classes[index - 1], 'return': None}
+            namespace['__init__'] = __init__
+        classes.append(type('Chained{0}_{1}'.format(count, index), (), namespace))
+    return classes
+
+
+def _container_scenarios(size: int) -> dict[str, Scenario]:
+    services = {'app.module_{0}.Service{1}'.format(index % 50, index): Service(index) for index in range(size)}
+    repository = Repository()
+    container = Container({'env': {'name': 'benchmark', 'debug': False}})
+    for key, val in services.items():
+        container.set(key, val)
+    container.set(repository)
+
+    flat = {**services, fqdn(Repository): repository}
+    by_type = {Repository: repository}
+    nested = {'env': {'name': 'benchmark', 'debug': False}}
+    dotted = 'app.module_7.Service{0}'.format(size // 2 - (size // 2) % 50 + 7)
+    values = list(flat.values())
+    provider = container.provider(Repository, typ=Repository)
+
+    return {
+        'get_str': (lambda: container.get(fqdn(Repository)), lambda: flat[fqdn(Repository)]),
+        'get_type': (lambda: container.get(Repository), lambda: by_type[Repository]),
+        'get_dotted': (lambda: container.get(dotted), lambda: flat[dotted]),
+        'get_nested': (lambda: container.get('env.name'), lambda: nested['env']['name']),
+        'provider': (provider, lambda: by_type[Repository]),
+        'contains_hit': (lambda: 'env.name' in container, lambda: 'name' in nested['env']),
+        'contains_miss': (lambda: 'env.missing' in container, lambda: 'missing' in nested['env']),
+        'instance_of': (
+            lambda: container.get(Repository, instance_of=True),
+            lambda: [val for val in values if isinstance(val, Repository)],
+        ),
+    }
+
+
+def _resolve_scenarios(sizes: tuple[int, ...]) -> dict[str, Scenario]:
+    scenarios: dict[str, Scenario] = {}
+    for count in sizes:
+        classes = _chain(count)
+
+        def resolve(classes: list[type] = classes) -> Container:
+            container = Container()
+            container.resolve(list(classes))
+            return container
+
+        def instantiate(classes: list[type] = classes) -> dict[type, Any]:
+            instances: dict[type, Any] = {classes[0]: classes[0]()}
+            for previous, cls in zip(classes, classes[1:]):
+                instances[cls] = cls(instances[previous])
+            return instances
+
+        scenarios['resolve_{0}'.format(count)] = (resolve, instantiate)
+    return scenarios
+
+
+def _resolver_scenarios() -> dict[str, Scenario]:
+    variable_resolver = VariableResolver()
+    service_resolver = ServiceResolver()
+    variables = {'name': 'benchmark', 'version': '1.0.0', 'port': '8000'}
+    templates: dict[str, tuple[str, Callable[[], Any]]] = {
+        'variable_var': ('%var(name)%', lambda: variables['name']),
+        'variable_typed_env': (
+            "%env(int:AIODI_BENCHMARK_PORT, '8000')%",
+            lambda: int(getenv('AIODI_BENCHMARK_PORT', '8000')),
+        ),
+        'variable_concat': (
+            "%var(name)%-%var(version)%:%env(str:AIODI_BENCHMARK_HOST, 'localhost')%",
+            lambda: '{0}-{1}:{2}'.format(
+                variables['name'], variables['version'], getenv('AIODI_BENCHMARK_HOST', 'localhost')
+            ),
+        ),
+    }
+    scenarios: dict[str, Scenario] = {}
+    for name, (template, baseline) in templates.items():
+        metadata = variable_resolver.extract_metadata(data={'key': name, 'val': template}, extra={})
+        scenarios[name] = (
+            lambda metadata=metadata: variable_resolver.parse_value(  # type: ignore
+                metadata=metadata, retries=-1, extra={'variables': variables}
+            ),
+            baseline,
+        )
+
+    repository = Repository()
+    services: dict[str, Any] = {'svc_{0}'.format(index): Service(index) for index in range(100)}
+    services[fqdn(Repository)] = repository
+    service_metadata = service_resolver.extract_metadata(
+        data={'key': fqdn(Finder), 'val': {'type': fqdn(Finder)}, 'defaults': ServiceDefaults()},
+        extra={},
+    )
+    extra = {'variables': variables, 'services': services, 'resolvers': {'variable': variable_resolver}}
+    scenarios['service_autowire'] = (
+        lambda: service_resolver.parse_value(metadata=service_metadata, retries=-1, extra=extra),
+        lambda: Finder(repository=repository),
+    )
+    return scenarios
+
+
+def measure(fn: Callable[[], Any], min_time: float = 0.2, repeat: int = 5) -> dict[str, Any]:
+    """
+    Best of repeat timings of a calibrated number of calls, then allocations of a single warm call.
+    Calls slower than min_time are timed once, and their allocations are skipped past ten times min_time.
+    """
+    number = 1
+    while True:
+        started = perf_counter()
+        for _ in range(number):
+            fn()
+        best = perf_counter() - started
+        if best >= min_time / repeat or number >= 1 << 24:
+            break
+        number *= 2
+    if best < min_time:
+        for _ in range(repeat):
+            started = perf_counter()
+            for _ in range(number):
+                fn()
+            best = min(best, perf_counter() - started)
+
+    result: dict[str, Any] = {'ops_per_sec': number / best, 'ns_per_op': best / number * 1e9}
+    if best / number > min_time * 10:
+        return {**result, 'peak_bytes': None, 'retained_bytes': None}
+    start()
+    reset_peak()
+    before = get_traced_memory()[0]
+    fn()
+    current, peak = get_traced_memory()
+    stop()
+    return {**result, 'peak_bytes': peak - before, 'retained_bytes': current - before}
+
+
+def run(
+    size: int = 1_000,
+    resolve_sizes: tuple[int, ...] = (10, 100, 1_000),
+    compare: bool = False,
+    only: str | None = None,
+    min_time: float = 0.2,
+) -> dict[str, dict[str, Any]]:
+    scenarios = {**_container_scenarios(size), **_resolve_scenarios(resolve_sizes), **_resolver_scenarios()}
+    results: dict[str, dict[str, Any]] = {}
+    for name, (fn, baseline) in scenarios.items():
+        if only and only not in name:
+            continue
+        results[name] = measure(fn, min_time=min_time)
+        if compare and baseline is not None:
+            results[name]['baseline'] = measure(baseline, min_time=min_time)
+            results[name]['slowdown'] = results[name]['baseline']['ops_per_sec'] / results[name]['ops_per_sec']
+    return results
+
+
+def _report(results: dict[str, dict[str, Any]], previous: dict[str, dict[str, Any]]) -> str:
+    lines = [
+        '{0:<22} {1:>14} {2:>12} {3:>12} {4:>10} {5:>10}'.format('', 'ops/s', 'ns/op', 'peak B', 'vs dict', 'vs prev')
+    ]
+    for name, result in results.items():
+        change = ''
+        if name in previous:
+            change = '{0:+.1%}'.format(result['ops_per_sec'] / previous[name]['ops_per_sec'] - 1)
+        lines.append(
+            '{0:<22} {1:>14,.1f} {2:>12,.1f} {3:>12} {4:>10} {5:>10}'.format(
+                name,
+                result['ops_per_sec'],
+                result['ns_per_op'],
+                '-' if result['peak_bytes'] is None else '{0:,}'.format(result['peak_bytes']),
+                '{0:.1f}x'.format(result['slowdown']) if 'slowdown' in result else '',
+                change,
+            )
+        )
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument('--size', type=int, default=1_000, help='services in the container of lookup scenarios')
+    parser.add_argument(
+        '--resolve-sizes',
+        default='10,100,1000',
+        help='comma separated items of Container.resolve scenarios, e.g. 10,100 for a quick run',
+    )
+    parser.add_argument('--compare', action='store_true', help='also run plain-dict equivalents')
+    parser.add_argument('--filter', default=None, help='only run scenarios containing this text')
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds spent timing each scenario')
+    parser.add_argument('--output', default=None, help='write results as JSON')
+    parser.add_argument('--diff', default=None, help='JSON results of a previous run to compare with')
+    args = parser.parse_args()
+
+    results = run(
+        size=args.size,
+        resolve_sizes=tuple(int(size) for size in args.resolve_sizes.split(',') if size),
+        compare=args.compare,
+        only=args.filter,
+        min_time=args.min_time,
+    )
+    previous = loads(Path(args.diff).read_text(encoding='utf-8'))['results'] if args.diff else {}
+    print(_report(results, previous))
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(
+            dumps({'python': python_version(), 'aiodi': __version__, 'size': args.size, 'results': results}, indent=2),
+            encoding='utf-8',
+        )
+
+
+if __name__ == '__main__':
+    main()
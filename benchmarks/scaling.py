@@ -0,0 +1,139 @@
+"""
+Time and memory of ContainerBuilder.load() on synthetic projects of growing size, fitting t ~ a * n^k per phase and
+flagging exponents above a threshold (super-linear behaviour such as retries or autowire scans).
+
+e.g.
+python3 -m benchmarks.scaling --sizes 250,500,1000,2000 --output var/benchmarks/scaling.json
+"""
+
+from argparse import ArgumentParser
+from gc import collect
+from json import dumps
+from math import exp, log
+from pathlib import Path
+from sys import modules as sys_modules
+from sys import path as sys_path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from tracemalloc import get_traced_memory, reset_peak, start, stop
+from typing import Any
+
+from aiodi import ContainerBuilder, TraceRecorder
+from aiodi.instrument import PHASE, POSTPONE, RETRY
+
+from .synthetic import generate
+
+
+def fit(sizes: list[int], values: list[float]) -> tuple[float, float]:
+    """Least squares of log(value) = log(a) + k * log(size), returns (a, k)."""
+    points = [(log(size), log(val)) for size, val in zip(sizes, values) if val > 0]
+    if len(points) < 2:
+        return 0.0, 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    k = sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x if var_x else 0.0
+    return exp(mean_y - k * mean_x), k
+
+
+def _load(root: Path, package: str, trace: bool, memory: bool) -> dict[str, Any]:
+    recorder = TraceRecorder() if trace else None
+    sys_path.insert(0, str(root))
+    try:
+        collect()
+        if memory:
+            start()
+            reset_peak()
+        started = perf_counter()
+        ContainerBuilder(filenames=['pyproject.toml'], cwd=str(root), instrument=recorder).load()
+        elapsed = perf_counter() - started
+        peak = get_traced_memory()[1] if memory else None
+        if memory:
+            stop()
+    finally:
+        sys_path.remove(str(root))
+        for name in [name for name in sys_modules if name == package or name.startswith(package + '.')]:
+            del sys_modules[name]
+    result: dict[str, Any] = {'seconds': elapsed, 'peak_bytes': peak}
+    if recorder is not None:
+        result['phases'] = recorder.durations(kind=PHASE)
+        result['retries'] = len(recorder.events(kind=RETRY))
+        result['postpones'] = len(recorder.events(kind=POSTPONE))
+    return result
+
+
+def measure(services: int, options: dict[str, Any], repeat: int = 3) -> dict[str, Any]:
+    """Best of repeat loads (each one on a freshly generated package, so imports are not cached) plus one traced."""
+    runs: list[dict[str, Any]] = []
+    with TemporaryDirectory(prefix='aiodi-scaling-') as tmp:
+        for run in range(repeat + 2):
+            package = 'synthetic_{0}_{1}'.format(services, run)
+            project = generate(root=Path(tmp) / package, package=package, services=services, **options)
+            runs.append(_load(root=project.root, package=package, trace=run == repeat, memory=run == repeat + 1))
+    timings = runs[:repeat]
+    best = min(timings, key=lambda item: item['seconds'])
+    return {
+        'services': services,
+        'edges': project.edges,
+        'seconds': best['seconds'],
+        'peak_bytes': runs[-1]['peak_bytes'],
+        'phases': runs[repeat]['phases'],
+        'retries': runs[repeat]['retries'],
+        'postpones': runs[repeat]['postpones'],
+    }
+
+
+def analyse(results: list[dict[str, Any]], max_exponent: float = 1.2) -> dict[str, Any]:
+    sizes = [result['services'] for result in results]
+    series: dict[str, list[float]] = {
+        'total': [result['seconds'] for result in results],
+        'peak_bytes': [float(result['peak_bytes']) for result in results],
+        'postpones': [float(result['postpones']) for result in results],
+    }
+    for phase in results[0]['phases']:
+        series['phase.{0}'.format(phase)] = [result['phases'].get(phase, 0.0) for result in results]
+    fits: dict[str, dict[str, Any]] = {}
+    for name, values in series.items():
+        coefficient, exponent = fit(sizes, values)
+        fits[name] = {'coefficient': coefficient, 'exponent': exponent, 'super_linear': exponent > max_exponent}
+    return fits
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument('--sizes', default='100,200,400,800', help='comma separated number of services')
+    parser.add_argument('--modules-per-service', type=float, default=0.1)
+    parser.add_argument('--depth', type=int, default=6)
+    parser.add_argument('--fan-out', type=int, default=3)
+    parser.add_argument('--no-shuffle', action='store_true', help='declare services in dependency order')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-exponent', type=float, default=1.2, help='flag fitted exponents above it')
+    parser.add_argument('--output', default=None, help='write results as JSON')
+    args = parser.parse_args()
+
+    results = []
+    for services in [int(size) for size in args.sizes.split(',') if size]:
+        options = {
+            'modules': max(1, int(services * args.modules_per_service)),
+            'depth': args.depth,
+            'fan_out': args.fan_out,
+            'shuffle': not args.no_shuffle,
+        }
+        results.append(measure(services=services, options=options, repeat=args.repeat))
+        print(
+            '{0:>7} services {1:>10.1f} ms {2:>12,} B peak {3:>8} postpones'.format(
+                services, results[-1]['seconds'] * 1e3, results[-1]['peak_bytes'], results[-1]['postpones']
+            )
+        )
+    fits = analyse(results, max_exponent=args.max_exponent)
+    for name, item in fits.items():
+        print(
+            '{0:<20} n^{1:.2f}{2}'.format(name, item['exponent'], '  <- super-linear' if item['super_linear'] else '')
+        )
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(dumps({'results': results, 'fits': fits}, indent=2), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Synthetic projects in the shape of sample/: a package of modules with service classes and a pyproject.toml wiring them
+through "@service" arguments, "%var()%" arguments and autowiring.
+
+e.g.
+python3 -m benchmarks.synthetic var/synthetic --services 1000 --modules 100 --depth 6 --fan-out 3
+"""
+
+from argparse import ArgumentParser
+from pathlib import Path
+from random import Random
+from typing import NamedTuple
+
+SVC = 'svc'
+VAR = 'var'
+TYP = 'typ'
+
+
+class SyntheticProject(NamedTuple):
+    root: Path
+    package: str
+    filename: Path
+    services: int
+    edges: dict[str, int]  # dependencies per kind
+
+
+def generate(
+    root: str | Path,
+    package: str = 'synthetic_app',
+    services: int = 100,
+    modules: int = 10,
+    depth: int = 5,
+    fan_out: int = 3,
+    variables: int | None = None,
+    shuffle: bool = True,
+    seed: int = 0,
+) -> SyntheticProject:
+    """
+    Services are split in depth levels, each one depending on up to fan_out services of the previous level, cycling
+    through "@service" arguments, autowired parameters and a "%var()%" argument. Modules hold consecutive services, so
+    they only import previous modules. With shuffle, services are declared in random order as in real projects.
+    """
+    rng = Random(seed)
+    root = Path(root)
+    variables = max(1, services // 10) if variables is None else variables
+    modules = max(1, min(modules, services))
+    level_of = [index * depth // services for index in range(services)]
+    module_of = [index * modules // services for index in range(services)]
+    levels: dict[int, list[int]] = {}
+    for index, level in enumerate(level_of):
+        levels.setdefault(level, []).append(index)
+
+    kinds = (SVC, TYP, VAR)
+    edges = {SVC: 0, TYP: 0, VAR: 0}
+    sources: dict[int, list[str]] = {index: [] for index in range(modules)}
+    imports: dict[int, set[tuple[int, int]]] = {index: set() for index in range(modules)}
+    arguments: dict[int, dict[str, str]] = {}
+    for index in range(services):
+        previous = levels.get(level_of[index] - 1, [])
+        deps = rng.sample(previous, min(fan_out, len(previous)))
+        params: list[str] = []
+        arguments[index] = {}
+        for position, dep in enumerate(deps):
+            kind = kinds[(index + position) % len(kinds)]
+            edges[kind] += 1
+            if kind == VAR:
+                params.append('label_{0}: str'.format(position))
+                arguments[index]['label_{0}'.format(position)] = '%var(var_{0})%'.format(rng.randrange(variables))
+                continue
+            params.append('dep_{0}: Service{1}'.format(position, dep))
+            if module_of[dep] != module_of[index]:
+                imports[module_of[index]].add((module_of[dep], dep))
+            if kind == SVC:
+                arguments[index]['dep_{0}'.format(position)] = '@{0}'.format(_key(package, module_of[dep], dep))
+        sources[module_of[index]] += [
+            '',
+            '',
+            'class Service{0}:'.format(index),
+            '    def __init__(self{0}) -> None:'.format(''.join(', ' + param for param in params)),
+            '        self.args = ({0})'.format(''.join(param.split(':')[0] + ', ' for param in params)),
+        ]
+
+    package_dir = root / package
+    package_dir.mkdir(parents=True, exist_ok=True)
+    (package_dir / '__init__.py').write_text('', encoding='utf-8')
+    for module, lines in sources.items():
+        header = [
+            'from .mod_{0} import Service{1}'.format(dep_module, dep) for dep_module, dep in sorted(imports[module])
+        ]
+        (package_dir / 'mod_{0}.py'.format(module)).write_text('\n'.join(header + lines) + '\n', encoding='utf-8')
+
+    order = list(range(services))
+    if shuffle:
+        rng.shuffle(order)
+    toml = ['[tool.aiodi.variables]']
+    toml += [
+        (
+            "var_{0} = \"%env(str:SYNTHETIC_VAR_{0}, 'value_{0}')%\"".format(index)
+            if index % 2 == 0
+            else 'var_{0} = "%var(var_{1})%-{0}"'.format(index, index - 1)
+        )
+        for index in range(variables)
+    ]
+    for index in order:
+        toml += [
+            '',
+            '[tool.aiodi.services."{0}"]'.format(_key(package, module_of[index], index)),
+            'type = "{0}"'.format(_key(package, module_of[index], index)),
+        ]
+        if arguments[index]:
+            toml.append(
+                'arguments = {{ {0} }}'.format(
+                    ', '.join('{0} = "{1}"'.format(name, val) for name, val in arguments[index].items())
+                )
+            )
+    filename = root / 'pyproject.toml'
+    filename.write_text('\n'.join(toml) + '\n', encoding='utf-8')
+    return SyntheticProject(root=root, package=package, filename=filename, services=services, edges=edges)
+
+
+def _key(package: str, module: int, index: int) -> str:
+    return '{0}.mod_{1}.Service{2}'.format(package, module, index)
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument('root')
+    parser.add_argument('--package', default='synthetic_app')
+    parser.add_argument('--services', type=int, default=100)
+    parser.add_argument('--modules', type=int, default=10)
+    parser.add_argument('--depth', type=int, default=5)
+    parser.add_argument('--fan-out', type=int, default=3)
+    parser.add_argument('--variables', type=int, default=None)
+    parser.add_argument('--no-shuffle', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    project = generate(
+        root=args.root,
+        package=args.package,
+        services=args.services,
+        modules=args.modules,
+        depth=args.depth,
+        fan_out=args.fan_out,
+        variables=args.variables,
+        shuffle=not args.no_shuffle,
+        seed=args.seed,
+    )
+    print(project.filename)
+
+
+if __name__ == '__main__':
+    main()
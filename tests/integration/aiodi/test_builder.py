@@ -1,8 +1,34 @@
+import os
+import pickle
+from asyncio import create_task, gather, run
+from asyncio import sleep as sleep_async
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from json import loads
 from logging import Logger
+from mmap import mmap
+from multiprocessing import get_context
 from pathlib import Path
+from threading import Barrier, Timer, current_thread
+from threading import enumerate as enumerate_threads
+from time import perf_counter, sleep
+from typing import Any, Iterable, NamedTuple, Sequence
 
-from pytest import mark
+from pytest import CaptureFixture, MonkeyPatch, mark, raises
 
+from aiodi import (
+    ContainerBuilder,
+    InstancePool,
+    MemoryRecorder,
+    PoolLease,
+    RefreshingService,
+    TraceRecorder,
+    worker_container,
+    worker_initializer,
+)
+from aiodi.__main__ import main
+from aiodi.graph import ServiceGraph
+from aiodi.resolver import ValueResolutionPostponed
+from aiodi.resolver.service import ServiceResolver
 from sample.apps.settings import container
 from sample.libs.users.application.finder_service import UserFinderService
 from sample.libs.users.application.register_service import UserRegisterService
@@ -33,3 +59,823 @@ def test_container() -> None:
     )
 
     assert 'UserRepository' not in di  # just to ensure arg to be resolved is taken per fqdn instead of name
+
+
+def test_container_from_layered_files(tmp_path: Path) -> None:
+    (tmp_path / 'fragments').mkdir()
+    (tmp_path / 'services.toml').write_text(
+        '[tool.aiodi]\nimports = ["fragments/*.toml"]\n[tool.aiodi.variables]\nname = "base"\nlevel = "INFO"\n'
+    )
+    (tmp_path / 'fragments' / 'a.toml').write_text('[tool.aiodi.variables]\nname = "fragment"\nextra = "a"\n')
+    (tmp_path / 'services.prod.toml').write_text('[tool.aiodi.variables]\nlevel = "DEBUG"\n')
+
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+
+    assert di.get('env.name', typ=str) == 'base'
+    assert di.get('env.extra', typ=str) == 'a'
+    assert di.get('env.level', typ=str) == 'INFO'
+
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path), environment='prod').load()
+
+    assert di.get('env.name', typ=str) == 'base'
+    assert di.get('env.level', typ=str) == 'DEBUG'
+
+    def decoder(path: str | Path) -> dict[str, Any]:
+        return {'tool': {'aiodi': {'variables': {'name': 'decoded'}}}}
+
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path), toml_decoder=decoder).load()
+
+    assert di.get('env.name', typ=str) == 'decoded'
+    assert ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load().get('env.name') == 'base'
+
+
+def test_container_from_globbed_files_with_overlays(tmp_path: Path) -> None:
+    (tmp_path / 'fragments').mkdir()
+    (tmp_path / 'services.toml').write_text('[tool.aiodi]\nimports = ["fragments/*.toml"]\n')
+    (tmp_path / 'fragments' / 'log.toml').write_text('[tool.aiodi.variables]\nlog_level = "INFO"\n')
+    for env, level in (('dev', 'DEBUG'), ('uat', 'TRACE'), ('prod', 'WARNING')):
+        (tmp_path / 'fragments' / 'log.{0}.toml'.format(env)).write_text(
+            '[tool.aiodi.variables]\nlog_level = "{0}"\n{1} = "yes"\n'.format(level, env)
+        )
+
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+
+    assert di.get('env.log_level', typ=str) == 'INFO'
+    assert 'env.dev' not in di and 'env.uat' not in di and 'env.prod' not in di
+
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path), environment='dev').load()
+
+    assert di.get('env.log_level', typ=str) == 'DEBUG'
+    assert 'env.dev' in di and 'env.uat' not in di and 'env.prod' not in di
+
+
+def test_container_with_trace_recorder(tmp_path: Path) -> None:
+    recorder = TraceRecorder()
+    ContainerBuilder(
+        filenames=['../../../sample/pyproject.toml'], cwd=str(Path(__file__).parent.absolute()), instrument=recorder
+    ).load()
+
+    assert list(recorder.durations(kind='phase').keys()) == ['path', 'loader', 'variable', 'service']
+    assert 'logging.Logger' in recorder.durations()
+    assert 'sample.libs.users.application.finder_service' in recorder.durations(kind='import')
+    assert recorder.summary(top=1)[0][0] in recorder.durations()
+
+    recorder.write(tmp_path / 'trace.json')
+    trace = loads((tmp_path / 'trace.json').read_text())
+
+    assert {event['ph'] for event in trace['traceEvents']} >= {'X'}
+    assert all(event['ts'] >= 0 for event in trace['traceEvents'])
+
+
+def test_container_with_memory_recorder(tmp_path: Path) -> None:
+    recorder = MemoryRecorder()
+    di = ContainerBuilder(
+        filenames=['../../../sample/pyproject.toml'], cwd=str(Path(__file__).parent.absolute()), instrument=recorder
+    ).load()
+    recorder.stop()
+
+    report = recorder.report(graph=di.plan.graph)
+    rows = {row['name']: row for row in report}
+
+    assert 'logging.Logger' in rows
+    assert all('subtree_blocks' in row for row in report)
+    assert [row['subtree_size'] for row in report] == sorted((row['subtree_size'] for row in report), reverse=True)
+
+    recorder.write(tmp_path / 'memory.json', graph=di.plan.graph)
+    memory = loads((tmp_path / 'memory.json').read_text())
+
+    assert set(memory.keys()) == {'import', 'service'}
+    assert memory['service'] == report
+
+
+def test_cli(capsys: CaptureFixture[str]) -> None:
+    argv = ['--cwd', str(Path(__file__).parent.absolute()), '--filename', '../../../sample/pyproject.toml', '--json']
+
+    assert main([*argv, 'unreferenced']) == 0
+    unreferenced = loads(capsys.readouterr().out)
+    assert 'sample.libs.users.application.finder_service.UserFinderService' in unreferenced
+    assert 'logging.Logger' not in unreferenced
+
+    assert main([*argv, 'graph']) == 0
+    assert loads(capsys.readouterr().out)['UserLogger'] == ['logging.Logger']
+
+    assert main([*argv, 'critical-path']) == 0
+    assert loads(capsys.readouterr().out)['seconds'] > 0
+
+    assert main([*argv, 'phases']) == 0
+    assert list(loads(capsys.readouterr().out)['phases'].keys()) == ['path', 'loader', 'variable', 'service']
+
+
+def test_cli_with_relative_cwd(capsys: CaptureFixture[str], monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.chdir(Path(__file__).parent.parent.parent.parent / 'sample' / 'apps')
+
+    assert main(['--cwd', '.', '--filename', '../pyproject.toml', '--json', 'graph']) == 0
+    assert loads(capsys.readouterr().out)['UserLogger'] == ['logging.Logger']
+
+
+class ConcurrentService:
+    barrier = Barrier(3)
+
+    def __init__(self) -> None:
+        self.thread = current_thread().name
+        ConcurrentService.barrier.wait()  # broken unless the three of them are constructed at once
+
+
+class ConcurrentAggregateService:
+    def __init__(self, first: ConcurrentService, second: ConcurrentService) -> None:
+        self.services = [first, second]
+        self.thread = current_thread().name
+
+
+def test_container_with_thread_pool(tmp_path: Path) -> None:
+    (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.services."first"]
+class = "tests.integration.aiodi.test_builder.ConcurrentService"
+[tool.aiodi.services."second"]
+class = "tests.integration.aiodi.test_builder.ConcurrentService"
+[tool.aiodi.services."third"]
+class = "tests.integration.aiodi.test_builder.ConcurrentService"
+[tool.aiodi.services."aggregate"]
+class = "tests.integration.aiodi.test_builder.ConcurrentAggregateService"
+arguments = { first = "@first", second = "@second" }
+threadsafe = false
+''')
+    ConcurrentService.barrier = Barrier(3, timeout=10)
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load(max_workers=3)
+    threads = {di.get(key, typ=ConcurrentService).thread for key in ('first', 'second', 'third')}
+
+    assert len(threads) == 3 and all(thread.startswith('aiodi') for thread in threads)
+    assert di.get('aggregate', typ=ConcurrentAggregateService).thread == current_thread().name
+    assert di.get('aggregate', typ=ConcurrentAggregateService).services == [di.get('first'), di.get('second')]
+
+
+def test_container_levels_keep_services_built_before_a_postponement() -> None:
+    class Metadata(NamedTuple):
+        name: str
+        threadsafe: bool = True
+
+    class PostponingResolver(ServiceResolver):
+        def __init__(self) -> None:
+            self.built: list[str] = []
+
+        def parse_value(self, metadata: Any, retries: int, extra: dict[str, Any]) -> Any:
+            if metadata.name == 'postponed':
+                raise ValueResolutionPostponed(key='unknown', value=metadata, times=retries + 1)
+            self.built.append(metadata.name)
+            return metadata.name
+
+    resolver = PostponingResolver()
+    items: dict[str, Any] = {
+        'first': (Metadata('first'), 0),
+        'second': (Metadata('second', threadsafe=False), 0),
+        'postponed': (Metadata('postponed', threadsafe=False), 0),
+    }
+    storage: dict[str, Any] = {}
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        ContainerBuilder._construct_levels(
+            resolver=resolver,
+            graph=ServiceGraph(dependencies={key: () for key in items}),
+            executor=executor,
+            storage=storage,
+            extra={},
+            items=items,
+        )
+
+    assert storage == {'first': 'first', 'second': 'second'}
+    assert list(items.keys()) == ['postponed']
+    assert sorted(resolver.built) == ['first', 'second']
+
+
+class ProcessBoundClient:
+    built = 0
+
+    def __init__(self) -> None:
+        self.pid = os.getpid()
+        ProcessBoundClient.built += 1
+
+
+class ProcessBoundClientUser:
+    def __init__(self, client: ProcessBoundClient) -> None:
+        self.client = client
+
+
+@mark.skipif(not hasattr(os, 'fork'), reason='fork() is not available')
+def test_container_rebuilds_fork_unsafe_services_in_children(tmp_path: Path) -> None:
+    (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.services."client"]
+class = "tests.integration.aiodi.test_builder.ProcessBoundClient"
+fork_safe = false
+[tool.aiodi.services."user"]
+class = "tests.integration.aiodi.test_builder.ProcessBoundClientUser"
+arguments = { client = "@client" }
+[tool.aiodi.services."shared"]
+class = "tests.integration.aiodi.test_builder.ProcessBoundClient"
+''')
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+    di.prefork(freeze=False)
+    di.prefork(freeze=False)
+    shared = di.get('shared')
+    built = ProcessBoundClient.built
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        rebuilt = di.get('client').pid == os.getpid() and di.get('user').client is di.get('client')
+        rebuilt = rebuilt and ProcessBoundClient.built == built + 1
+        os.write(write_fd, b'1' if rebuilt and di.get('shared') is shared else b'0')
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert os.read(read_fd, 1) == b'1'
+    assert di.get('client').pid == os.getpid()
+
+
+class ParentOnlyClient:
+    parent = os.getpid()
+
+    def __init__(self) -> None:
+        if os.getpid() != ParentOnlyClient.parent:
+            raise ConnectionError('unreachable from children')
+
+
+@mark.skipif(not hasattr(os, 'fork'), reason='fork() is not available')
+def test_container_fork_with_failed_rebuilds(tmp_path: Path) -> None:
+    (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.services."client"]
+class = "tests.integration.aiodi.test_builder.ParentOnlyClient"
+fork_safe = false
+[tool.aiodi.services."user"]
+class = "tests.integration.aiodi.test_builder.ProcessBoundClientUser"
+arguments = { client = "@client" }
+''')
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+    di.prefork(freeze=False)
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        failed = 0
+        for key in ('client', 'user'):
+            try:
+                di.get(key)
+            except RuntimeError as err:
+                failed += 'could not be rebuilt after fork' in str(err)
+        os.write(write_fd, str(failed).encode())
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert os.read(read_fd, 1) == b'2'
+    assert isinstance(di.get('client'), ParentOnlyClient)
+
+
+def test_derived_container() -> None:
+    di = container(filename='../../../sample/pyproject.toml', cwd=str(Path(__file__).parent.absolute()))
+    repository = InMemoryUserRepository()
+
+    tenant = di.derive(services={InMemoryUserRepository: repository}, variables={'name': 'tenant'})
+
+    assert tenant.get('env.name') == 'tenant' and di.get('env.name') == 'sample'
+    assert tenant.get(Logger).name == 'tenant' and di.get(Logger).name == 'sample'
+    assert tenant.get('UserLogger').logger() is tenant.get(Logger)
+    assert tenant.get(InMemoryUserRepository) is repository
+    assert tenant.get(UserRegisterService) is not di.get(UserRegisterService)
+    assert di.get(InMemoryUserRepository) is not repository
+    assert tenant.get('env.version') == di.get('env.version')
+
+    tenant = di.derive(variables={'name': 'tenant'})
+
+    assert tenant.get(InMemoryUserRepository) is di.get(InMemoryUserRepository)
+    assert tenant.get(UserRegisterService) is di.get(UserRegisterService)
+    assert tenant.get(UserFinderService) is not di.get(UserFinderService)
+
+    fake = InMemoryUserRepository()
+    forked = di.override({UserRepository: fake})
+
+    assert forked.get(UserFinderService)._repository is fake
+    assert di.get(UserFinderService)._repository is not fake
+
+    logger = InMemoryUserLogger(logger=di.get(Logger))
+    forked = di.override({InMemoryUserLogger: logger})
+
+    assert forked.get('UserLogger') is logger and di.get('UserLogger') is not logger
+    raises(KeyError, lambda: di.override({Database: Database(url='')}))
+
+
+class Database:
+    def __init__(self, url: str) -> None:
+        self.url = url
+
+
+def test_derived_container_with_chained_variables(tmp_path: Path) -> None:
+    (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.variables]
+host = "localhost"
+url = "postgres://%var(host)%/db"
+dsn = "%var(url)%?sslmode=require"
+[tool.aiodi.services."database"]
+class = "tests.integration.aiodi.test_builder.Database"
+arguments = { url = "%var(dsn)%" }
+''')
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+
+    tenant = di.derive(variables={'host': 'tenant'})
+
+    assert tenant.get('env.url') == 'postgres://tenant/db'
+    assert tenant.get('env.dsn') == 'postgres://tenant/db?sslmode=require'
+    assert tenant.get('database', typ=Database).url == 'postgres://tenant/db?sslmode=require'
+    assert di.get('database', typ=Database).url == 'postgres://localhost/db?sslmode=require'
+    assert di.snapshot().load().derive(variables={'host': 'tenant'}).get('env.dsn') == tenant.get('env.dsn')
+
+
+class RequestState:
+    def __init__(self, client: ProcessBoundClient) -> None:
+        self.client = client
+
+
+async def test_container_with_task_scoped_services(tmp_path: Path) -> None:
+    (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.services."client"]
+class = "tests.integration.aiodi.test_builder.ProcessBoundClient"
+[tool.aiodi.services."state"]
+class = "tests.integration.aiodi.test_builder.RequestState"
+arguments = { client = "@client" }
+scope = "task"
+''')
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+
+    async def handle() -> RequestState:
+        state = di.get('state', typ=RequestState)
+        await sleep_async(0)
+        assert di.get('state') is state
+        return state
+
+    first, second = await gather(create_task(handle()), create_task(handle()))
+
+    assert first is not second
+    assert first.client is second.client is di.get('client')
+    assert 'state' in di
+
+    (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.services."client"]
+class = "tests.integration.aiodi.test_builder.ProcessBoundClient"
+scope = "task"
+[tool.aiodi.services."state"]
+class = "tests.integration.aiodi.test_builder.RequestState"
+arguments = { client = "@client" }
+''')
+
+    with raises(ValueError, match='task scoped service <client>'):
+        ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+
+
+class LoopBoundSession:
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class SessionClient:
+    def __init__(self, session: LoopBoundSession) -> None:
+        self.session = session
+
+
+def test_container_with_loop_scoped_services(tmp_path: Path) -> None:
+    (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.services."session"]
+class = "tests.integration.aiodi.test_builder.LoopBoundSession"
+scope = "loop"
+''')
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+
+    async def handle() -> LoopBoundSession:
+        sessions = await gather(*[create_task(sleep_async(0, di.get('session'))) for _ in range(3)])
+        assert all(session is sessions[0] and not session.closed for session in sessions)
+        return sessions[0]
+
+    first, second = run(handle()), run(handle())
+
+    assert first is not second
+    assert first.closed and second.closed
+
+    for scope, accepted in (('task', True), ('loop', True), ('singleton', False), ('lazy', False)):
+        (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.services."session"]
+class = "tests.integration.aiodi.test_builder.LoopBoundSession"
+scope = "loop"
+[tool.aiodi.services."client"]
+class = "tests.integration.aiodi.test_builder.SessionClient"
+arguments = {{ session = "@session" }}
+scope = "{0}"
+'''.format(scope))
+        if accepted:
+            assert 'client' in ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+        else:
+            with raises(ValueError, match='loop scoped service <session>'):
+                ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+
+
+class Parser:
+    def __init__(self) -> None:
+        self.busy = False
+
+    def parse(self) -> 'Parser':
+        assert not self.busy
+        self.busy = True
+        sleep(0.01)
+        self.busy = False
+        return self
+
+
+class Importer:
+    def __init__(self, parsers: InstancePool) -> None:
+        self.parsers = parsers
+
+    def run(self) -> Parser:
+        with self.parsers.lease() as parser:
+            return parser.parse()
+
+    async def arun(self) -> Parser:
+        async with self.parsers.lease() as parser:
+            await sleep_async(0.01)
+            return parser
+
+
+async def test_container_with_pooled_services(tmp_path: Path) -> None:
+    (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.services."parser"]
+class = "tests.integration.aiodi.test_builder.Parser"
+pool = { size = 2, max_idle = 30 }
+''')
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+
+    def handle() -> Parser:
+        with di.get('parser') as parser:
+            return parser.parse()
+
+    async def ahandle() -> Parser:
+        async with di.get('parser') as parser:
+            await sleep_async(0.01)
+            return parser
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        parsers = set(executor.map(lambda _: handle(), range(8)))
+    parsers.update(await gather(*[ahandle() for _ in range(4)]))
+
+    assert len(parsers) == 2
+    assert isinstance(di.get('parser'), PoolLease)
+
+    (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.services."parser"]
+class = "tests.integration.aiodi.test_builder.Parser"
+pool = { size = 2 }
+[tool.aiodi.services."importer"]
+class = "tests.integration.aiodi.test_builder.Importer"
+arguments = { parsers = "@parser" }
+''')
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+    importer = di.get('importer', typ=Importer)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        parsers = set(executor.map(lambda _: importer.run(), range(8)))
+    parsers.update(await gather(*[importer.arun() for _ in range(4)]))
+
+    assert len(parsers) == 2
+    assert importer.parsers.stats() == {'size': 2, 'created': 2, 'idle': 2, 'in_use': 0}
+
+
+class EventHandler:
+    built = 0
+
+    def __init__(self) -> None:
+        EventHandler.built += 1
+
+
+class AuditEventHandler(EventHandler):
+    pass
+
+
+class MailEventHandler(EventHandler):
+    pass
+
+
+class MetricsEventHandler(EventHandler):
+    pass
+
+
+class EventBus:
+    def __init__(self, handlers: list[EventHandler], tagged: Iterable[EventHandler]) -> None:
+        self.handlers = handlers
+        self.tagged = tagged
+
+
+class Greeter:
+    def __init__(self, names: list[str] = ['a', 'b'], sizes: Iterable[int] = (1, 2)) -> None:
+        self.names = names
+        self.sizes = sizes
+
+
+def test_container_with_tagged_services(tmp_path: Path) -> None:
+    (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.services."bus"]
+class = "tests.integration.aiodi.test_builder.EventBus"
+arguments = { tagged = "#event_handler" }
+[tool.aiodi.services."audit"]
+class = "tests.integration.aiodi.test_builder.AuditEventHandler"
+tags = ["event_handler"]
+[tool.aiodi.services."mail"]
+class = "tests.integration.aiodi.test_builder.MailEventHandler"
+tags = [{ name = "event_handler", priority = 10 }]
+scope = "task"
+[tool.aiodi.services."metrics"]
+class = "tests.integration.aiodi.test_builder.MetricsEventHandler"
+tags = [{ name = "event_handler", priority = -5 }]
+[tool.aiodi.services."greeter"]
+class = "tests.integration.aiodi.test_builder.Greeter"
+''')
+    built = EventHandler.built
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+    bus = di.get('bus', typ=EventBus)
+
+    assert EventHandler.built == built  # tagged handlers are only built when reached
+    assert isinstance(bus.handlers, Sequence) and not isinstance(bus.handlers, list)
+    assert isinstance(bus.handlers[1], AuditEventHandler)
+    assert EventHandler.built == built + 1
+    assert di.plan is not None and di.plan.graph.dependencies('bus') == ('mail', 'audit', 'metrics')
+    assert list(bus.handlers) == [bus.handlers[0], di.get('audit'), di.get('metrics')]
+    assert isinstance(bus.handlers[0], MailEventHandler)
+    assert [type(handler) for handler in bus.tagged] == [type(handler) for handler in bus.handlers]
+    assert next(iter(di.tagged('event_handler'))) is bus.handlers[0]
+    assert di.tagged('event_handler').keys() == ('mail', 'audit', 'metrics')
+    assert len(di.tagged('unknown')) == 0
+    assert EventHandler.built == built + 3  # singletons once, the task scoped handler once in this context
+    assert di.get('greeter', typ=Greeter).names == ['a', 'b']
+    assert di.get('greeter', typ=Greeter).sizes == (1, 2)
+
+
+class HeavyModel:
+    built = 0
+
+    def __init__(self) -> None:
+        HeavyModel.built += 1
+        sleep(0.05)
+
+
+class HeavyIndex:
+    def __init__(self, model: HeavyModel) -> None:
+        self.model = model
+
+
+def test_container_warms_lazy_services_up(tmp_path: Path) -> None:
+    (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.services."index"]
+class = "tests.integration.aiodi.test_builder.HeavyIndex"
+arguments = { model = "@model" }
+warmup = true
+[tool.aiodi.services."model"]
+class = "tests.integration.aiodi.test_builder.HeavyModel"
+lazy = true
+[tool.aiodi.services."other"]
+class = "tests.integration.aiodi.test_builder.HeavyModel"
+lazy = true
+''')
+    built = HeavyModel.built
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+
+    assert HeavyModel.built == built
+
+    warmup = di.warmup()
+
+    assert di.get('index', typ=HeavyIndex).model is di.get('model')
+    assert warmup.wait(timeout=5)
+    assert warmup.status() == {'ready': True, 'built': 1, 'total': 1, 'pending': [], 'errors': {}}
+    assert HeavyModel.built == built + 1
+    assert di.warmup(keys=['other']).wait(timeout=5)
+    assert HeavyModel.built == built + 2
+
+
+class Vocabulary:
+    def __init__(self, table: bytes, header: bytes) -> None:
+        self.table = table
+        self.header = header
+
+
+def test_container_with_file_variables(tmp_path: Path) -> None:
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'vocab.bin').write_bytes(b'\x00\x01vocabulary')
+    (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.variables]
+vocab = "%file(mmap:data/vocab.bin)%"
+[tool.aiodi.services."vocabulary"]
+class = "tests.integration.aiodi.test_builder.Vocabulary"
+arguments = { table = "%var(vocab)%", header = "%file(bytes:data/vocab.bin)%" }
+''')
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+    vocabulary = di.get('vocabulary', typ=Vocabulary)
+
+    assert isinstance(vocabulary.table, mmap) and vocabulary.table is di.get('env.vocab')
+    assert vocabulary.table[2:] == b'vocabulary'
+    assert vocabulary.header == b'\x00\x01vocabulary'
+
+    (tmp_path / 'services.toml').write_text('[tool.aiodi.variables]\nvocab = "v%file(bytes:data/vocab.bin)%"\n')
+    with raises(ValueError):
+        ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+
+
+class CountingRepository:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def find(self, user_id: str) -> dict[str, str]:
+        self.calls += 1
+        return {'id': user_id}
+
+
+def counting_repository() -> CountingRepository:
+    return CountingRepository()
+
+
+def test_container_with_cached_methods(tmp_path: Path) -> None:
+    (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.services."repository"]
+class = "tests.integration.aiodi.test_builder.CountingRepository"
+cache = { find = { maxsize = 100, ttl = 60 } }
+''')
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+    repository = di.get('repository', typ=CountingRepository)
+
+    assert repository.find('42') is repository.find('42')
+    assert repository.calls == 1
+    assert di.cache_stats()['repository']['find']['hits'] == 1
+
+    (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.services."repository"]
+type = "tests.integration.aiodi.test_builder.CountingRepository"
+class = "tests.integration.aiodi.test_builder.counting_repository"
+cache = { find = { maxsize = 100 } }
+''')
+    repository = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load().get('repository')
+
+    assert repository.find('42') is repository.find('42') and repository.calls == 1
+
+    (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.services."repository"]
+class = "tests.integration.aiodi.test_builder.CountingRepository"
+cache = { missing = { ttl = 60 } }
+''')
+    with raises(ValueError):
+        ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+
+
+class Credentials:
+    issued = 0
+
+    def __init__(self) -> None:
+        Credentials.issued += 1
+        self.token = Credentials.issued
+
+
+class ScopedCredentials(Credentials):
+    def __init__(self, scope: str) -> None:
+        super().__init__()
+        self.scope = scope
+
+
+def _refresh_timers(typ: type) -> int:
+    services = [thread.args[0]() for thread in enumerate_threads() if isinstance(thread, Timer)]
+    return sum(isinstance(service, RefreshingService) and service.type is typ for service in services)
+
+
+def test_container_with_refreshed_services(tmp_path: Path) -> None:
+    (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.services."credentials"]
+class = "tests.integration.aiodi.test_builder.Credentials"
+refresh = { ttl = 0.05, jitter = 0.01 }
+''')
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+    first = di.get('credentials', typ=Credentials)
+
+    assert di.get('credentials') is first
+
+    started = perf_counter()
+    while di.get('credentials') is first and perf_counter() - started < 5:
+        sleep(0.01)
+
+    assert di.get('credentials', typ=Credentials).token > first.token
+
+    (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.variables]
+scope = "read"
+[tool.aiodi.services."credentials"]
+class = "tests.integration.aiodi.test_builder.ScopedCredentials"
+arguments = { scope = "%var(scope)%" }
+refresh = { ttl = 60 }
+''')
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+    derived = [di.derive(variables={'scope': 'write'}) for _ in range(20)]
+
+    assert _refresh_timers(ScopedCredentials) == 0  # started on first lookup
+    assert derived[0].get('credentials', typ=ScopedCredentials).scope == 'write'
+    assert _refresh_timers(ScopedCredentials) == 1
+
+    refreshing = RefreshingService(factory=Credentials, typ=Credentials, ttl=60)
+    current = refreshing.resolve()
+    refreshing.stop()
+
+    assert refreshing.refresh() and refreshing.resolve() is not current
+
+
+@mark.skipif(not hasattr(os, 'fork'), reason='fork() is not available')
+def test_refreshed_services_keep_refreshing_in_children() -> None:
+    refreshing = RefreshingService(factory=Credentials, typ=Credentials, ttl=0.05)
+    first = refreshing.resolve()
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        started = perf_counter()
+        while refreshing.resolve() is first and perf_counter() - started < 5:
+            sleep(0.01)
+        os.write(write_fd, b'1' if refreshing.resolve() is not first else b'0')
+        os._exit(0)
+    os.waitpid(pid, 0)
+    refreshing.stop()
+
+    assert os.read(read_fd, 1) == b'1'
+
+
+class LanguageModel:
+    built = 0
+
+    def __init__(self) -> None:
+        LanguageModel.built += 1
+        self.weights = bytearray(1024)
+
+
+def test_container_with_cached_services(tmp_path: Path) -> None:
+    (tmp_path / 'services.toml').write_text('''
+[tool.aiodi.services."english"]
+class = "tests.integration.aiodi.test_builder.LanguageModel"
+cached = { maxsize = 1 }
+[tool.aiodi.services."spanish"]
+class = "tests.integration.aiodi.test_builder.LanguageModel"
+scope = "cached"
+''')
+    built = LanguageModel.built
+    di = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+
+    assert LanguageModel.built == built
+    assert di.get('english') is di.get('english')
+    assert LanguageModel.built == built + 1
+
+    english = di.get('english', typ=LanguageModel)
+    di.get('spanish')
+
+    assert di.get('english') is english  # evicted, but still alive
+    assert LanguageModel.built == built + 2
+
+    del english
+    di.get('spanish')  # evicts english again, nothing keeps it alive anymore
+    di.get('english')
+
+    assert LanguageModel.built == built + 3
+    assert di.cached_services().stats() == {'size': 2, 'bytes': 0, 'evictions': 2}
+
+    other = ContainerBuilder(filenames=['services.toml'], cwd=str(tmp_path)).load()
+    other.get('english')
+    other.get('spanish')
+
+    assert other.cached_services().stats()['evictions'] == 1
+    assert di.cached_services().stats()['evictions'] == 2  # each container has its own LRU
+    assert di.get('english') is di.get('english')
+    assert LanguageModel.built == built + 5
+
+    english = di.get('english')
+    derived = di.derive()
+
+    assert derived.get('english') is english  # alive in the base container
+    assert derived.cached_services().stats() == {'size': 1, 'bytes': 0, 'evictions': 0}
+    derived.get('spanish')  # alive in the base container too, evicts english from the derived one only
+    assert derived.cached_services().stats() == {'size': 1, 'bytes': 0, 'evictions': 1}
+    assert di.cached_services().stats() == {'size': 2, 'bytes': 0, 'evictions': 2}
+    assert LanguageModel.built == built + 5
+
+
+def _worker_user_finder() -> str:
+    return type(worker_container().get(UserFinderService)).__name__
+
+
+def test_container_snapshot_in_spawned_workers() -> None:
+    di = container(filename='../../../sample/pyproject.toml', cwd=str(Path(__file__).parent.absolute()))
+    snapshot = pickle.loads(pickle.dumps(di.snapshot()))
+    loaded = snapshot.load()
+
+    assert loaded.get('env.name', typ=str) == 'sample'
+    assert isinstance(loaded.get(UserFinderService), UserFinderService)
+    assert set(snapshot.services) == set(di.plan.services)
+
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=get_context('spawn'), initializer=worker_initializer, initargs=(di.snapshot(),)
+    ) as pool:
+        assert pool.submit(_worker_user_finder).result(timeout=60) == 'UserFinderService'
@@ -0,0 +1,60 @@
+from asyncio import gather
+from asyncio import sleep as sleep_async
+from time import sleep
+
+from pytest import raises
+
+from aiodi.cache import CacheOptions, cache_stats, intercept
+
+
+class _Repository:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def find(self, user_id: str, active: bool = True) -> dict[str, str]:
+        self.calls += 1
+        return {'id': user_id}
+
+    async def afind(self, user_id: str) -> dict[str, str]:
+        self.calls += 1
+        await sleep_async(0.01)
+        return {'id': user_id}
+
+
+def test_method_cache() -> None:
+    repository = intercept(_Repository(), {'find': CacheOptions(maxsize=2, ttl=0.05)})
+
+    assert repository.find('1') is repository.find('1')
+    assert repository.find('1', active=False) is not repository.find('1')
+    repository.find('2')
+    repository.find({'unhashable': True})
+    assert repository.calls == 4
+    assert cache_stats(repository) == {
+        'find': {'hits': 2, 'misses': 3, 'coalesced': 0, 'evictions': 1, 'size': 2, 'maxsize': 2}
+    }
+
+    sleep(0.06)
+    repository.find('2')
+    assert repository.calls == 5
+
+    with raises(ValueError):
+        CacheOptions.from_value(name='find', val={'maxsize': 0})
+    with raises(ValueError):
+        CacheOptions.from_value(name='find', val={'size': 10})
+
+
+async def test_async_method_cache_single_flight() -> None:
+    repository = intercept(_Repository(), {'afind': CacheOptions()})
+
+    first, second = await gather(repository.afind('1'), repository.afind('1'))
+
+    assert first is second and repository.calls == 1
+    assert await repository.afind('1') is first
+    assert cache_stats(repository)['afind'] == {
+        'hits': 1,
+        'misses': 2,
+        'coalesced': 1,
+        'evictions': 0,
+        'size': 1,
+        'maxsize': 128,
+    }
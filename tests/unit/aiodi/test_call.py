@@ -0,0 +1,50 @@
+from typing import Iterable, Optional
+
+from pytest import raises
+
+from aiodi import Container
+from aiodi.call import call_plan
+
+
+class _Repository:
+    pass
+
+
+class _Mailer:
+    pass
+
+
+class _Handler:
+    def __init__(self, repository: _Repository) -> None:
+        self.repository = repository
+
+    def handle(
+        self, user_id: int, repository: _Repository, mailer: Optional[_Mailer] = None
+    ) -> tuple[int, _Repository]:
+        assert mailer is None
+        return user_id, repository
+
+
+def _find(user_id: int, repository: _Repository, mailer: _Mailer | None, all_: Iterable[_Repository]) -> tuple:
+    return user_id, repository, mailer, list(all_)
+
+
+def test_container_call() -> None:
+    repository = _Repository()
+    container = Container()
+    container.set(repository)
+
+    assert container.call(_find, user_id='42') == (42, repository, None, [repository])
+    assert container.call(_find, 7, all_=[]) == (7, repository, None, [])
+    assert container.partial(_find)(user_id=1)[0] == 1
+    assert call_plan(_find) is call_plan(_find)
+    assert container.call(_Handler).repository is repository
+
+    handler = _Handler(repository)
+    assert container.call(_Handler.handle, handler, user_id='3') == (3, repository)
+    assert container.call(handler.handle, user_id='3') == (3, repository)
+    assert call_plan(_Handler.handle) is not call_plan(handler.handle)
+    assert call_plan(handler.handle) is call_plan(_Handler(repository).handle)
+
+    with raises(KeyError):
+        Container().call(_find, user_id=1)
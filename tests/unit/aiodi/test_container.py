@@ -1,3 +1,6 @@
+import subprocess
+import sys
+
 from pytest import raises
 
 from aiodi import Container
@@ -60,3 +63,48 @@ def test_container() -> None:
     raises(KeyError, lambda: container.get(key='services.bar'))
 
     assert not container.__contains__('')
+
+
+def test_container_fork() -> None:
+    container = Container({'config': {'a': 1}})
+    forked = container.fork()
+
+    forked.set('other.x', 1)
+    forked.set('config.a', 2)
+
+    assert forked.get('other.x') == 1 and forked.get('config.a') == 2
+    assert 'other.x' not in container and container.get('config.a') == 1
+
+
+def test_container_provider() -> None:
+    class _Repository:
+        pass
+
+    container = Container({'config': {'version': '0.1.0'}})
+    container.set(_Repository())
+
+    repository = container.provider(_Repository)
+    version = container.provider('config.version', typ=str)
+
+    assert repository() is container.get(_Repository)
+    assert version() == '0.1.0'
+
+    container.set('config.version', '0.2.0')
+    replaced = _Repository()
+    container.set(replaced)
+
+    assert version() == '0.2.0'
+    assert repository() is replaced
+
+    with raises(KeyError):
+        container.provider('config.missing')
+    with raises(TypeError):
+        container.provider('config.version', typ=int)
+
+
+def test_container_import_does_not_load_the_builder() -> None:
+    code = 'import sys; from aiodi import Container; print(" ".join(sorted(sys.modules)))'
+    modules = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.split()
+
+    assert 'aiodi.container' in modules
+    assert not {'aiodi.builder', 'aiodi.resolver', 'asyncio', 'inspect'}.intersection(modules)
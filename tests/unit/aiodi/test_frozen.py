@@ -0,0 +1,41 @@
+from pickle import dumps, loads
+
+from pytest import raises
+
+from aiodi import Container, FrozenContainer
+
+
+def test_frozen_container() -> None:
+    class _Service:
+        pass
+
+    svc = _Service()
+    container = Container({'config': {'environment': 'test'}})
+    container.set(_Service, svc)
+    for index in range(100):
+        container.set('services.svc_{0}'.format(index), index)
+
+    frozen = container.freeze()
+
+    assert isinstance(frozen, FrozenContainer)
+    assert len(frozen) == 102
+    assert frozen.get('config.environment', typ=str) == 'test'
+    assert frozen.get(_Service) is svc
+    assert frozen.get(svc) is svc
+    assert frozen.get('services.svc_42') == 42
+    assert frozen.get('config') == {'environment': 'test'}
+    assert frozen.get(_Service, instance_of=True) == [svc]
+    assert 'services.svc_100' not in frozen
+    assert 'config.environment' in frozen
+
+    raises(KeyError, lambda: frozen.get('services.svc_100'))
+    raises(TypeError, lambda: frozen.get('services.svc_1', typ=str))
+    raises(TypeError, lambda: frozen.set('config.environment', 'prod'))
+    raises(TypeError, lambda: frozen.__setitem__('config', {}))
+
+
+def test_frozen_container_is_picklable() -> None:
+    frozen = loads(dumps(Container({'config': {'environment': 'test'}, 'name': 'aiodi'}).freeze()))
+
+    assert frozen.get('config.environment') == 'test'
+    assert frozen.get('name') == 'aiodi'
@@ -0,0 +1,20 @@
+from pytest import raises
+
+from aiodi.graph import ServiceGraph
+
+
+def test_service_graph() -> None:
+    graph = ServiceGraph(dependencies={'a': [], 'b': ['a'], 'c': ['a'], 'd': ['b', 'c']})
+
+    assert graph.levels() == [['a'], ['b', 'c'], ['d']]
+    assert graph.order(keys=['d', 'a']) == ['a', 'd']
+    assert graph.dependents('a') == ('b', 'c')
+    assert graph.transitive_dependents(['b']) == {'b', 'd'}
+    assert graph.transitive_dependencies('d') == {'a', 'b', 'c'}
+    assert graph.unreferenced() == ['d']
+    assert graph.is_complete()
+    assert graph.critical_path(durations={'a': 1.0, 'b': 0.5, 'c': 2.0, 'd': 1.0}) == (['a', 'c', 'd'], 4.0)
+    assert '"d" -> "b";' in graph.to_dot()
+
+    raises(ValueError, lambda: ServiceGraph(dependencies={'a': ['b'], 'b': ['a']}).levels())
+    assert not ServiceGraph(dependencies={'a': ['missing']}).is_complete()
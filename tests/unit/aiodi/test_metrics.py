@@ -0,0 +1,46 @@
+from pytest import raises
+
+from aiodi import Container, ContainerMetrics
+from aiodi.scope import LazyService
+
+
+def test_container_metrics() -> None:
+    class _Service:
+        pass
+
+    container = Container({'config': {'version': '0.1.0'}, 'lazy': LazyService(factory=_Service, typ=_Service)})
+    container.set(_Service, _Service())
+    get = Container.get
+
+    metrics = container.enable_metrics(ContainerMetrics(services=['lazy', 'unused']))
+
+    assert container.get('config.version') == '0.1.0'
+    assert isinstance(container.get('lazy'), _Service)
+    assert container.get('lazy') is container.get('lazy')
+    assert isinstance(container.get(_Service), _Service)
+    assert 'config.version' in container
+    assert 'config.foo' not in container
+    with raises(KeyError):
+        container.get('foo')
+
+    snapshot = metrics.snapshot()
+    assert snapshot['keys']['config.version']['hits'] == 2
+    assert snapshot['keys']['config.foo']['misses'] == 1
+    assert snapshot['keys']['foo']['misses'] == 1
+    assert snapshot['keys']['lazy']['hits'] == 3
+    assert snapshot['keys']['lazy']['construction']['count'] == 1
+    assert snapshot['keys']['config.version']['construction']['count'] == 0
+    assert snapshot['keys'][_Service.__module__ + '._Service']['hits'] == 1
+    assert snapshot['unrequested'] == ['unused']
+
+    text = metrics.to_prometheus()
+    assert 'aiodi_lookups_total{key="config.version",result="hit"} 2' in text
+    assert 'aiodi_construction_seconds_count{key="lazy"} 1' in text
+    assert 'aiodi_lookup_seconds_bucket{key="foo",le="+Inf"} 1' in text
+    assert 'aiodi_unrequested_services 1' in text
+
+    container.disable_metrics()
+
+    assert type(container) is Container and type(container).get is get
+    container.get('config.version')
+    assert metrics.snapshot()['keys']['config.version']['hits'] == 2
@@ -0,0 +1,33 @@
+from time import sleep
+
+from pytest import raises
+
+from aiodi import InstancePool
+
+
+def test_instance_pool() -> None:
+    class _Client:
+        def __init__(self) -> None:
+            self.closed = False
+
+        def close(self) -> None:
+            self.closed = True
+
+    pool = InstancePool(factory=_Client, size=2, max_idle=0.01)
+
+    with pool.lease() as first, pool.lease() as second:
+        assert first is not second
+        assert pool.stats() == {'size': 2, 'created': 2, 'idle': 0, 'in_use': 2}
+        with raises(TimeoutError):
+            pool.acquire(timeout=0.01)
+
+    sleep(0.02)
+    with pool.lease() as third:
+        assert third is not first and third is not second
+        assert first.closed and second.closed
+    assert pool.stats() == {'size': 2, 'created': 1, 'idle': 1, 'in_use': 0}
+
+    lease = pool.lease()
+    with lease:
+        with raises(RuntimeError):
+            lease.__enter__()
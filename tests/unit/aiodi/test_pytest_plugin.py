@@ -0,0 +1,29 @@
+from pytest import Pytester
+
+pytest_plugins = ['pytester']
+
+
+def test_pytest_plugin(pytester: Pytester) -> None:
+    pytester.makeconftest('''
+from pytest import fixture
+
+from aiodi import Container
+
+pytest_plugins = ['aiodi.pytest_plugin']
+
+
+@fixture(scope='session')
+def aiodi_base_container() -> Container:
+    return Container({'config': {'environment': 'test'}})
+''')
+    pytester.makepyfile('''
+def test_first(aiodi_container, aiodi_base_container) -> None:
+    aiodi_container.set('config.environment', 'changed')
+    assert aiodi_container.get('config.environment') == 'changed'
+    assert aiodi_base_container.get('config.environment') == 'test'
+
+
+def test_second(aiodi_container) -> None:
+    assert aiodi_container.get('config.environment') == 'test'
+''')
+    pytester.runpytest_inprocess('-p', 'no:cacheprovider').assert_outcomes(passed=2)